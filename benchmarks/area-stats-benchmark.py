@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Time each stage of area-stats-generator.py on synthetic fixtures, without touching api.btcmap.org.
+
+Stages:
+    load       get_areas and load_reports (with --stream, parsing moves into join)
+    join       join_reports
+    metrics    calculate_metrics over all four area groups
+    write      write_outputs for the four CSVs
+
+Usage:
+    python area-stats-benchmark.py [--areas N [N ...]] [--days N] [--repeat N] [--output FILE]
+
+Examples:
+    python area-stats-benchmark.py --areas 100 1000 10000
+    python area-stats-benchmark.py --areas 100000 --days 30 --stream --output results.json
+
+Results are printed as a table and, with --output, written as JSON so runs can be compared.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from harness import load_area_stats_module, quiet_stdout, time_call, write_results
+from synthetic_data import write_fixture
+
+STAGES = ["load", "join", "metrics", "write"]
+
+
+def run_stages(module, data_dir, keep_history=False, stream=False):
+    timings = {}
+    previous_directory = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        with quiet_stdout():
+            load_areas_seconds, groups = time_call(module.get_areas)
+            load_reports_seconds, reports = time_call(module.load_reports, stream=stream)
+            timings["load"] = load_areas_seconds + load_reports_seconds
+
+            all_areas = [area for group in groups for area in group]
+            timings["join"], _ = time_call(module.join_reports, all_areas, reports, latest_only=not keep_history)
+            del reports
+
+            timings["metrics"], _ = time_call(module.calculate_metrics, *groups)
+
+            categories = {
+                os.path.join(data_dir, f"{name}_stats"): group
+                for name, group in zip(["global", "country", "community", "others"], groups)
+            }
+            timings["write"], _ = time_call(module.write_outputs, categories)
+    finally:
+        os.chdir(previous_directory)
+
+    timings["total"] = sum(timings[stage] for stage in STAGES)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage timings for area-stats-generator.py on synthetic data")
+    parser.add_argument("--areas", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Fixture sizes in areas (default: 100 1000 10000)")
+    parser.add_argument("--days", type=int, default=30, help="Days of daily reports per area (default: 30)")
+    parser.add_argument("--vertices", type=int, default=32, help="Vertices per area polygon (default: 32)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the fastest is kept (default: 3)")
+    parser.add_argument("--keep-history", action="store_true", help="Join every report instead of the latest only")
+    parser.add_argument("--stream", action="store_true", help="Stream reports.json instead of loading it whole")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    module = load_area_stats_module()
+    results = []
+
+    for area_count in args.areas:
+        data_dir = tempfile.mkdtemp(prefix=f"area-stats-{area_count}-")
+        try:
+            counts = write_fixture(data_dir, area_count, args.days, args.vertices, args.seed)
+            print(f"Fixture: {counts['areas']} areas, {counts['reports']} reports", file=sys.stderr)
+
+            runs = [run_stages(module, data_dir, args.keep_history, args.stream) for _ in range(args.repeat)]
+            best = {stage: min(run[stage] for run in runs) for stage in STAGES + ["total"]}
+            results.append({"areas": counts["areas"], "reports": counts["reports"], "seconds": best})
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"{'Areas':>8} {'Reports':>10} " + " ".join(f"{stage:>9}" for stage in STAGES + ["total"]))
+    for result in results:
+        seconds = result["seconds"]
+        print(f"{result['areas']:>8} {result['reports']:>10} " + " ".join(f"{seconds[stage]:>9.3f}" for stage in STAGES + ["total"]))
+
+    if args.output:
+        write_results(args.output, "area-stats", {
+            "days": args.days,
+            "vertices": args.vertices,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "keep_history": args.keep_history,
+            "stream": args.stream,
+        }, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Measure the resident set of a full areas + reports load in area-stats-generator.py.
+
+The load runs twice, each in a fresh process. The first run rebuilds the Area and Report classes the
+script originally had: instance dicts, every area's tags (geo_json included) kept alive, report dates
+as strings and verification dates as datetimes. The second uses the current classes, with __slots__,
+no tags and dates as epoch-day ints, so the difference covers both changes. Both load the full
+report history.
+
+Usage:
+    python area-stats-memory.py [--data-dir DIR | --synthetic-areas N] [--json]
+
+DIR must hold areas.json and reports.json, by default the cache area-stats-generator.py leaves
+in data-analysis/. With --synthetic-areas a seeded fixture of that many areas is generated instead.
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from harness import DATA_ANALYSIS_DIRECTORY, current_rss_bytes, load_area_stats_module, quiet_stdout
+from synthetic_data import write_fixture
+
+
+def parse_legacy_date(date_string):
+    # As the original Report.parse_date did, only the date part is parsed into a datetime
+    if date_string:
+        try:
+            return datetime.strptime(date_string.split('T')[0], '%Y-%m-%d')
+        except ValueError:
+            pass
+    return None
+
+
+def make_legacy_classes():
+    # The original layout: instance dicts, the full tags dict kept on every area and dates left as
+    # strings or datetimes, with the latest report found by max() rather than tracked
+
+    class LegacyArea:
+        def __init__(self, id, tags):
+            self.id = id
+            self.alias = tags.get('url_alias')
+            self.name = tags.get('name')
+            self.tags = tags
+            self.reports = []
+            self.population = tags.get('population')
+            self.area_km2 = tags.get('area_km2')
+            self.merchants_per_capita = None
+            self.merchants_per_km2 = None
+            self.average_verification_age = None
+            self.weighted_average_verification_age = None
+            self.total_merchants = None
+            self.weighted_total_merchants = None
+            self.score = None
+
+        def add_report(self, report):
+            self.reports.append(report)
+
+        def get_latest_report(self):
+            if self.reports:
+                return max(self.reports, key=lambda report: report.date)
+
+    class LegacyReport:
+        def __init__(self, report_data):
+            tags = report_data['tags']
+            self.id = report_data['id']
+            self.date = report_data['date']
+            self.average_verification_date = parse_legacy_date(tags.get('avg_verification_date'))
+            self.grade = tags.get('grade')
+            self.legacy_elements = tags.get('legacy_elements')
+            self.outdated_elements = tags.get('outdated_elements')
+            self.total_elements = tags.get('total_elements')
+            self.total_elements_lightning = tags.get('total_elements_lightning')
+            self.total_elements_lightning_contactless = tags.get('total_elements_lightning_contactless')
+            self.total_elements_onchain = tags.get('total_elements_onchain')
+            self.total_elements_atms = tags.get('total_atms')
+            self.up_to_date_elements = tags.get('up_to_date_elements')
+            self.up_to_date_percent = tags.get('up_to_date_percent')
+
+    return LegacyArea, LegacyReport
+
+
+def measure_load(layout, data_dir):
+    module = load_area_stats_module()
+    if layout == "legacy":
+        module.Area, module.Report = make_legacy_classes()
+
+    os.chdir(data_dir)
+    gc.collect()
+    rss_before = current_rss_bytes()
+    with quiet_stdout():
+        groups = module.get_areas()
+        areas = [area for group in groups for area in group]
+        # Stream the reports so the parsed JSON list does not dominate either layout
+        module.get_reports(areas, latest_only=False, stream=True)
+    gc.collect()
+
+    return {
+        "layout": layout,
+        "areas": len(areas),
+        "reports": sum(len(area.reports) for area in areas),
+        "rss_delta_bytes": current_rss_bytes() - rss_before,
+    }
+
+
+def measure_layouts(data_dir):
+    for file_name in ("areas.json", "reports.json"):
+        if not os.path.exists(os.path.join(data_dir, file_name)):
+            print(f"Missing {file_name} in {data_dir}, run area-stats-generator.py first", file=sys.stderr)
+            sys.exit(1)
+
+    results = []
+    for layout in ("legacy", "compact"):
+        # Each layout gets a fresh interpreter so freed memory from the other run cannot be reused
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--data-dir", data_dir, "--layout", layout],
+            check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident-set benchmark for the area-stats data model")
+    parser.add_argument("--data-dir", default=DATA_ANALYSIS_DIRECTORY,
+                        help="Directory holding areas.json and reports.json")
+    parser.add_argument("--synthetic-areas", type=int, metavar="N",
+                        help="Measure a generated fixture with N areas instead of --data-dir")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--layout", choices=["legacy", "compact"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    data_dir = os.path.abspath(args.data_dir)
+
+    if args.layout:
+        print(json.dumps(measure_load(args.layout, data_dir)))
+        return
+
+    if args.synthetic_areas:
+        data_dir = tempfile.mkdtemp(prefix="area-stats-memory-")
+        try:
+            write_fixture(data_dir, areas=args.synthetic_areas)
+            results = measure_layouts(data_dir)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    else:
+        results = measure_layouts(data_dir)
+
+    legacy, compact = results
+    summary = {
+        "results": results,
+        "rss_saved_bytes": legacy["rss_delta_bytes"] - compact["rss_delta_bytes"],
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{'Layout':<10} {'Areas':>8} {'Reports':>10} {'RSS (MiB)':>10}")
+    for result in results:
+        print(f"{result['layout']:<10} {result['areas']:>8} {result['reports']:>10} {result['rss_delta_bytes'] / 2**20:>10.1f}")
+    print(f"\nCompact layout saves {summary['rss_saved_bytes'] / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Compare the vertex-mean centroid the community scripts used with the vectorized area-weighted one in btcmap.geometry.
+
+Paths:
+    vertex-mean    mean of the first ring's vertices, one area at a time, as calculate_centroid did
+    shoelace       the same area-weighted centroid as btcmap.geometry, in plain Python one area at a time
+    vectorized     btcmap.geometry.centroids over every area in one call
+
+Usage:
+    python centroid-benchmark.py [--areas N [N ...]] [--vertices N] [--dense-share F] [--repeat N] [--output FILE]
+
+Examples:
+    python centroid-benchmark.py
+    python centroid-benchmark.py --areas 1000 10000 100000 --vertices 256 --output results.json
+
+Reading the GeoJSON lists into NumPy costs about as much as the vertex mean's own list comprehensions,
+so vectorized runs close to vertex-mean while giving the area-weighted answer. The speedup column
+compares it with the Python shoelace, which gives the same answer.
+
+Areas are the seeded synthetic polygons with one side digitized --dense-share times more finely,
+like a detailed coastline next to a straight border. The offset column is the largest distance (in
+degrees) between the two paths' centroids, i.e. how far the vertex mean was pulled towards the dense side.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from harness import time_call, write_results
+from synthetic_data import generate_areas
+from btcmap.geometry import centroids
+
+PATHS = ["vertex-mean", "shoelace", "vectorized"]
+
+
+def vertex_mean_centroid(geo_json):
+    # calculate_centroid from rpc-reports.py and fetch-communities.py before the shared geometry module
+    if not geo_json or 'coordinates' not in geo_json:
+        return None
+    coordinates = geo_json['coordinates']
+    if not coordinates or not isinstance(coordinates, list):
+        return None
+    ring = coordinates[0] if isinstance(coordinates[0][0], list) else coordinates
+    if not ring:
+        return None
+    lats = [point[1] for point in ring if len(point) >= 2]
+    lons = [point[0] for point in ring if len(point) >= 2]
+    if not lats or not lons:
+        return None
+    return (sum(lats) / len(lats), sum(lons) / len(lons))
+
+
+def shoelace_centroid(geo_json):
+    # Area-weighted centroid of a Polygon's rings in plain Python, holes subtracted
+    area_total = moment_x = moment_y = 0.0
+    for ring_index, ring in enumerate(geo_json["coordinates"]):
+        origin_x, origin_y = ring[0][0], ring[0][1]
+        ring_area = ring_x = ring_y = 0.0
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+            x1, y1, x2, y2 = x1 - origin_x, y1 - origin_y, x2 - origin_x, y2 - origin_y
+            cross = x1 * y2 - x2 * y1
+            ring_area += cross
+            ring_x += (x1 + x2) * cross
+            ring_y += (y1 + y2) * cross
+        sign = (1 if ring_area > 0 else -1) * (1 if ring_index == 0 else -1)
+        area_total += abs(ring_area) * (1 if ring_index == 0 else -1)
+        moment_x += (ring_x + 3 * origin_x * ring_area) * sign
+        moment_y += (ring_y + 3 * origin_y * ring_area) * sign
+    if not area_total:
+        return vertex_mean_centroid(geo_json)
+    return (moment_y / (3 * area_total), moment_x / (3 * area_total))
+
+
+def densify_edge(geo_json, factor):
+    # Split every edge of the ring's first quarter into factor pieces
+    ring = geo_json["coordinates"][0]
+    quarter = max(1, (len(ring) - 1) // 4)
+    dense = []
+    for (x1, y1), (x2, y2) in zip(ring[:quarter], ring[1:quarter + 1]):
+        dense.extend([x1 + (x2 - x1) * step / factor, y1 + (y2 - y1) * step / factor] for step in range(factor))
+    return {"type": "Polygon", "coordinates": [dense + ring[quarter:]]}
+
+
+def synthetic_geometries(count, vertices, dense_share, seed):
+    return [densify_edge(area["tags"]["geo_json"], dense_share) for area in generate_areas(count, vertices, seed)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vertex-mean and Python shoelace against vectorized area-weighted centroids")
+    parser.add_argument("--areas", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Numbers of areas (default: 100 1000 10000)")
+    parser.add_argument("--vertices", type=int, default=64, help="Vertices per ring before densifying (default: 64)")
+    parser.add_argument("--dense-share", type=int, default=10, help="Pieces each edge of the dense side is split into (default: 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the fastest is kept (default: 3)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.areas:
+        geo_jsons = synthetic_geometries(count, args.vertices, args.dense_share, args.seed)
+        seconds = {path: float("inf") for path in PATHS}
+        for _ in range(args.repeat):
+            vertex_mean_seconds, vertex_mean = time_call(lambda: [vertex_mean_centroid(geo_json) for geo_json in geo_jsons])
+            shoelace_seconds, shoelace = time_call(lambda: [shoelace_centroid(geo_json) for geo_json in geo_jsons])
+            vectorized_seconds, vectorized = time_call(centroids, geo_jsons)
+            if not np.allclose(shoelace, vectorized, rtol=0, atol=1e-9):
+                print(f"Warning: shoelace and vectorized centroids differ for {count} areas", file=sys.stderr)
+            seconds["vertex-mean"] = min(seconds["vertex-mean"], vertex_mean_seconds)
+            seconds["shoelace"] = min(seconds["shoelace"], shoelace_seconds)
+            seconds["vectorized"] = min(seconds["vectorized"], vectorized_seconds)
+        offset = float(np.max(np.hypot(*(np.array(vertex_mean) - np.array(vectorized)).T)))
+        results.append({"areas": count, "seconds": seconds, "max_offset_degrees": offset})
+
+    print(f"{'Areas':>8} " + " ".join(f"{path:>12}" for path in PATHS) + f" {'speedup':>8} {'offset':>8}")
+    for result in results:
+        seconds = result["seconds"]
+        speedup = seconds["shoelace"] / seconds["vectorized"] if seconds["vectorized"] else float("inf")
+        print(f"{result['areas']:>8} " + " ".join(f"{seconds[path]:>12.4f}" for path in PATHS)
+              + f" {speedup:>7.1f}x {result['max_offset_degrees']:>8.4f}")
+
+    if args.output:
+        write_results(args.output, "centroid", {"vertices": args.vertices, "dense_share": args.dense_share, "seed": args.seed, "repeat": args.repeat}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compare per-row and batched country lookups of community centroids for the flag lookup.
+
+Paths:
+    per-row    get_country_from_coordinates once per centroid, as the scripts used to
+    batched    get_countries_from_coordinates over every centroid in one query
+    borders    get_countries_from_borders, point-in-polygon against the Natural Earth borders
+
+Usage:
+    python flag-geocoding-benchmark.py [--communities N [N ...]] [--repeat N] [--output FILE]
+
+Examples:
+    python flag-geocoding-benchmark.py
+    python flag-geocoding-benchmark.py --communities 50 500 5000 --repeat 5 --output results.json
+
+Centroids come from the seeded synthetic areas. The reverse geocoder's KD-tree and the border
+index are loaded before timing starts, so every path is measured warm. Border lookups return
+None for points at sea, so only the two geocoder paths are checked against each other.
+"""
+
+import argparse
+import sys
+
+from harness import UTILITY_SCRIPTS_DIRECTORY, load_script, time_call, write_results
+from synthetic_data import generate_areas
+
+PATHS = ["per-row", "batched", "borders"]
+
+
+def community_centroids(flags_module, count, seed):
+    areas = generate_areas(count, vertices=16, seed=seed)
+    return flags_module.centroids([area["tags"]["geo_json"] for area in areas])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row against batched country lookups of community centroids")
+    parser.add_argument("--communities", type=int, nargs="+", default=[50, 500, 5000],
+                        help="Numbers of communities (default: 50 500 5000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the fastest is kept (default: 3)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    flags_module = load_script(UTILITY_SCRIPTS_DIRECTORY, "community_flags.py", "community_flags")
+    # Load the KD-tree and the border index once so no path pays for them
+    flags_module.get_countries_from_coordinates([(0.0, 0.0)])
+    flags_module.get_countries_from_borders([(0.0, 0.0)])
+
+    results = []
+    for count in args.communities:
+        centroids = community_centroids(flags_module, count, args.seed)
+        seconds = {path: float("inf") for path in PATHS}
+        for _ in range(args.repeat):
+            per_row_seconds, per_row = time_call(
+                lambda: [flags_module.get_country_from_coordinates(lat, lon) for lat, lon in centroids])
+            batched_seconds, batched = time_call(flags_module.get_countries_from_coordinates, centroids)
+            borders_seconds, _ = time_call(flags_module.get_countries_from_borders, centroids)
+            if per_row != batched:
+                print(f"Warning: per-row and batched country codes differ for {count} communities", file=sys.stderr)
+            seconds["per-row"] = min(seconds["per-row"], per_row_seconds)
+            seconds["batched"] = min(seconds["batched"], batched_seconds)
+            seconds["borders"] = min(seconds["borders"], borders_seconds)
+        results.append({"communities": count, "seconds": seconds})
+
+    print(f"{'Communities':>11} " + " ".join(f"{path:>10}" for path in PATHS) + f" {'speedup':>8}")
+    for result in results:
+        seconds = result["seconds"]
+        speedup = seconds["per-row"] / seconds["batched"] if seconds["batched"] else float("inf")
+        print(f"{result['communities']:>11} " + " ".join(f"{seconds[path]:>10.4f}" for path in PATHS) + f" {speedup:>7.1f}x")
+
+    if args.output:
+        write_results(args.output, "flag-geocoding", {"seed": args.seed, "repeat": args.repeat}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compare the area package with the vectorized geodesic area in btcmap.geometry on the Natural Earth country borders.
+
+Paths:
+    area-package    area.area() once per country, as the scripts used to
+    per-geometry    btcmap.geometry.geodesic_area() once per country
+    batched         btcmap.geometry.geodesic_areas() over every country in one call
+
+Usage:
+    python geodesic-area-benchmark.py [--resolutions R [R ...]] [--repeat N] [--output FILE]
+
+Examples:
+    python geodesic-area-benchmark.py
+    python geodesic-area-benchmark.py --resolutions 10m --repeat 5 --output results.json
+
+The borders are read from country-data-import/input before timing starts, so only the area
+computation is measured. The largest country of each resolution is timed on its own as well.
+The difference column is the largest relative difference from area.area() over all countries.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from area import area
+
+from harness import REPO_DIRECTORY, time_call, write_results
+from btcmap.geometry import geodesic_area, geodesic_areas
+
+BORDERS_DIRECTORY = os.path.join(REPO_DIRECTORY, "country-data-import", "input")
+PATHS = ["area-package", "per-geometry", "batched"]
+
+
+def load_geometries(resolution):
+    # One geometry per country file, the combined all.geojson is skipped
+    directory = os.path.join(BORDERS_DIRECTORY, f"geojson-regions-{resolution}")
+    names = []
+    geometries = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".geojson"):
+            continue
+        with open(os.path.join(directory, file_name), "r") as file:
+            feature = json.load(file)
+        if feature.get("type") == "Feature":
+            names.append(file_name)
+            geometries.append(feature["geometry"])
+    return names, geometries
+
+
+def vertex_count(geometry):
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    return sum(len(ring) for polygon in polygons for ring in polygon)
+
+
+def best_of(repeat, function, *args):
+    runs = [time_call(function, *args) for _ in range(repeat)]
+    return min(seconds for seconds, _ in runs), runs[0][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="area.area() against the vectorized geodesic area")
+    parser.add_argument("--resolutions", nargs="+", default=["110m", "50m", "10m"],
+                        help="Natural Earth resolutions (default: 110m 50m 10m)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path, the fastest is kept (default: 3)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for resolution in args.resolutions:
+        names, geometries = load_geometries(resolution)
+        vertices = [vertex_count(geometry) for geometry in geometries]
+        seconds = {}
+        seconds["area-package"], expected = best_of(args.repeat, lambda: [area(geometry) for geometry in geometries])
+        seconds["per-geometry"], _ = best_of(args.repeat, lambda: [geodesic_area(geometry) for geometry in geometries])
+        seconds["batched"], actual = best_of(args.repeat, geodesic_areas, geometries)
+        expected = np.array(expected)
+        difference = float(np.max(np.abs(actual - expected) / np.maximum(expected, 1.0)))
+
+        largest = int(np.argmax(vertices))
+        largest_seconds = {
+            "area-package": best_of(args.repeat, area, geometries[largest])[0],
+            "per-geometry": best_of(args.repeat, geodesic_area, geometries[largest])[0],
+        }
+        results.append({
+            "resolution": resolution,
+            "countries": len(geometries),
+            "vertices": sum(vertices),
+            "seconds": seconds,
+            "max_relative_difference": difference,
+            "largest": {"file": names[largest], "vertices": vertices[largest], "seconds": largest_seconds},
+        })
+
+    print(f"{'Resolution':>10} {'Countries':>9} {'Vertices':>9} " + " ".join(f"{path:>12}" for path in PATHS)
+          + f" {'speedup':>8} {'difference':>10}")
+    for result in results:
+        seconds = result["seconds"]
+        speedup = seconds["area-package"] / seconds["batched"] if seconds["batched"] else float("inf")
+        print(f"{result['resolution']:>10} {result['countries']:>9} {result['vertices']:>9} "
+              + " ".join(f"{seconds[path]:>12.4f}" for path in PATHS)
+              + f" {speedup:>7.1f}x {result['max_relative_difference']:>10.1e}")
+    print()
+    for result in results:
+        largest = result["largest"]
+        print(f"Largest {result['resolution']} country {largest['file']} ({largest['vertices']} vertices): "
+              f"area-package {largest['seconds']['area-package']:.4f}s, per-geometry {largest['seconds']['per-geometry']:.4f}s")
+
+    if args.output:
+        write_results(args.output, "geodesic-area", {"repeat": args.repeat}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#Helpers shared by the benchmark scripts.
+
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ANALYSIS_DIRECTORY = os.path.join(REPO_DIRECTORY, "data-analysis")
+UTILITY_SCRIPTS_DIRECTORY = os.path.join(REPO_DIRECTORY, "utility-scripts")
+
+# The shared btcmap package lives at the repository root
+if REPO_DIRECTORY not in sys.path:
+    sys.path.insert(0, REPO_DIRECTORY)
+
+
+def load_script(directory, file_name, module_name):
+    # The scripts have hyphenated names, so they are loaded from their path with their directory importable
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_area_stats_module():
+    return load_script(DATA_ANALYSIS_DIRECTORY, "area-stats-generator.py", "area_stats_generator")
+
+
+def current_rss_bytes():
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+@contextlib.contextmanager
+def quiet_stdout():
+    # The scripts print progress per area, which would swamp the benchmark output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def write_results(file_name, benchmark, parameters, results):
+    """Write a run as JSON with the machine it ran on, so runs can be compared."""
+    document = {
+        "benchmark": benchmark,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    with open(file_name, "w") as file:
+        json.dump(document, file, indent=2)
+    print(f"\nResults written to {file_name}", file=sys.stderr)
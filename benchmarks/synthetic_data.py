@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Seeded generator for synthetic areas.json and reports.json fixtures shaped like the BTC Map v3 API.
+
+Usage:
+    python synthetic_data.py <output_dir> [--areas N] [--days N] [--vertices N] [--seed N]
+
+Examples:
+    python synthetic_data.py /tmp/btcmap-fixture --areas 1000
+    python synthetic_data.py /tmp/btcmap-fixture --areas 100000 --days 30
+
+The same seed always produces the same files. Reports are written as they are generated, so
+fixtures with millions of reports never sit in memory.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+FIRST_REPORT_DATE = date(2023, 1, 1)
+
+# Roughly the mix of area types in the live API
+AREA_TYPE_WEIGHTS = [("community", 0.7), ("country", 0.2), (None, 0.1)]
+DELETED_AREA_SHARE = 0.02
+MISSED_REPORT_SHARE = 0.05
+
+
+def _polygon(rng, vertices):
+    # A jittered circle around a random centre, closed like GeoJSON rings are
+    lon = rng.uniform(-170, 170)
+    lat = rng.uniform(-60, 70)
+    radius = rng.uniform(0.05, 5)
+    ring = []
+    for index in range(vertices):
+        angle = 2 * math.pi * index / vertices
+        jitter = rng.uniform(0.8, 1.2)
+        ring.append([round(lon + radius * jitter * math.cos(angle), 6), round(lat + radius * jitter * math.sin(angle), 6)])
+    ring.append(ring[0])
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def generate_areas(count, vertices=32, seed=0):
+    rng = random.Random(seed)
+    types, weights = zip(*AREA_TYPE_WEIGHTS)
+    areas = []
+
+    for area_id in range(1, count + 1):
+        area_type = rng.choices(types, weights)[0]
+        tags = {
+            "name": f"Area {area_id}",
+            "url_alias": f"area-{area_id}",
+            "geo_json": _polygon(rng, vertices),
+        }
+        if area_type:
+            tags["type"] = area_type
+        # The API mixes numeric and string populations, and some areas have none
+        population = rng.randint(1_000, 50_000_000)
+        tags["population"] = rng.choice([population, str(population), None])
+        tags["area_km2"] = rng.choice([round(rng.uniform(1, 2_000_000), 2), rng.randint(1, 2_000_000), None])
+        tags = {key: value for key, value in tags.items() if value is not None}
+
+        deleted = rng.random() < DELETED_AREA_SHARE
+        areas.append({
+            "id": area_id,
+            "tags": tags,
+            "created_at": "2022-10-11T00:00:00Z",
+            "updated_at": f"{FIRST_REPORT_DATE.isoformat()}T00:00:00Z",
+            "deleted_at": f"{FIRST_REPORT_DATE.isoformat()}T00:00:00Z" if deleted else None,
+        })
+
+    return areas
+
+
+def generate_reports(areas, days=30, seed=0):
+    # One report per area per day with a few days missed, totals drifting upwards over time
+    rng = random.Random(seed + 1)
+    report_id = 1
+    totals = {area["id"]: rng.randint(0, 2_000) for area in areas}
+
+    for day in range(days):
+        report_date = FIRST_REPORT_DATE + timedelta(days=day)
+        for area in areas:
+            if rng.random() < MISSED_REPORT_SHARE:
+                continue
+            area_id = area["id"]
+            totals[area_id] += rng.randint(0, 3)
+            total_elements = totals[area_id]
+            atms = rng.randint(0, min(total_elements, 10))
+            up_to_date = rng.randint(0, total_elements)
+            verification_date = report_date - timedelta(days=rng.randint(0, 700))
+            yield {
+                "id": report_id,
+                "area_id": area_id,
+                "date": report_date.isoformat(),
+                "tags": {
+                    "avg_verification_date": f"{verification_date.isoformat()}T12:00:00.123456789Z" if up_to_date else None,
+                    "grade": rng.randint(1, 5),
+                    "legacy_elements": rng.randint(0, 5),
+                    "outdated_elements": total_elements - up_to_date,
+                    "total_atms": atms,
+                    "total_elements": total_elements,
+                    "total_elements_lightning": rng.randint(0, total_elements),
+                    "total_elements_lightning_contactless": rng.randint(0, 10),
+                    "total_elements_onchain": rng.randint(0, total_elements),
+                    "up_to_date_elements": up_to_date,
+                    "up_to_date_percent": up_to_date * 100 // total_elements if total_elements else 0,
+                },
+                "created_at": f"{report_date.isoformat()}T00:00:00Z",
+                "updated_at": f"{report_date.isoformat()}T00:00:00Z",
+                "deleted_at": None,
+            }
+            report_id += 1
+
+
+def write_json_array(records, file_name):
+    count = 0
+    with open(file_name, "w") as file:
+        file.write("[")
+        for record in records:
+            if count:
+                file.write(", ")
+            file.write(json.dumps(record))
+            count += 1
+        file.write("]")
+    return count
+
+
+def write_fixture(output_dir, areas=1000, days=30, vertices=32, seed=0):
+    os.makedirs(output_dir, exist_ok=True)
+    generated_areas = generate_areas(areas, vertices, seed)
+    area_count = write_json_array(generated_areas, os.path.join(output_dir, "areas.json"))
+    report_count = write_json_array(generate_reports(generated_areas, days, seed), os.path.join(output_dir, "reports.json"))
+    return {"areas": area_count, "reports": report_count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic BTC Map areas.json and reports.json")
+    parser.add_argument("output_dir")
+    parser.add_argument("--areas", type=int, default=1000, help="Number of areas (default: 1000)")
+    parser.add_argument("--days", type=int, default=30, help="Days of daily reports per area (default: 30)")
+    parser.add_argument("--vertices", type=int, default=32, help="Vertices per area polygon (default: 32)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = write_fixture(args.output_dir, args.areas, args.days, args.vertices, args.seed)
+    print(f"Wrote {counts['areas']} areas and {counts['reports']} reports to {args.output_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+#Code shared by the scripts in data-analysis/, utility-scripts/ and country-data-import/.
+#The scripts are run directly, so they put the repository root on sys.path before importing from here.
@@ -0,0 +1,93 @@
+#Shared HTTP client for the BTC Map scripts.
+#One pooled requests.Session per process keeps connections alive between calls, asks for compressed
+#responses, applies a default timeout and retries with exponential backoff on 429 and 5xx responses.
+#GETs of the API's area, report and element listings go through the on-disk cache in http_cache.py.
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from btcmap import http_cache
+
+# (connect, read) seconds, the read timeout applies between bytes so large streamed downloads are fine
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_RETRIES = 3
+# Waits of 0.5s, 1s, 2s ... between retries, or whatever Retry-After asks for
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# PATCH only sets tags, so repeating it is safe. POST is not retried after it reached the server
+RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"}
+# Connections kept per host, enough for the thread pools in rpc-reports.py and fetch-communities.py
+DEFAULT_POOL_SIZE = int(os.getenv("BTCMAP_HTTP_POOL_SIZE", "16"))
+USER_AGENT = "btcmap-data-scripts"
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request that does not set one."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT):
+    """A new pooled session with retries, for callers that need settings of their own."""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        # Hand the last response back instead of raising, the scripts check status codes themselves
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = TimeoutSession(timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": USER_AGENT,
+    })
+    return session
+
+
+shared_session = None
+shared_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide session, created on first use."""
+    global shared_session
+    if shared_session is None:
+        with shared_session_lock:
+            if shared_session is None:
+                shared_session = create_session()
+    return shared_session
+
+
+def get(url, cache=True, cache_ttl=None, **kwargs):
+    """GET on the shared session. cache=False skips the response cache, cache_ttl overrides its TTL."""
+    response_cache = http_cache.get_cache() if cache else None
+    if response_cache is None:
+        return get_session().get(url, **kwargs)
+    return response_cache.get(get_session(), url, ttl=cache_ttl, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return get_session().patch(url, **kwargs)
@@ -0,0 +1,198 @@
+#On-disk cache for GETs of the BTC Map API, used by client.get.
+#Bodies are stored gzip compressed next to a small JSON file with the validators, keyed by a hash of the
+#normalized URL. Within an endpoint's TTL an entry is served without touching the network, after that it
+#is revalidated with If-None-Match / If-Modified-Since, so an unchanged payload costs one 304.
+#When the API cannot be reached or answers with a 5xx, the stored entry is served however old it is.
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from btcmap.paths import USER_CACHE_DIRECTORY
+
+CACHE_DIRECTORY = os.getenv("BTCMAP_HTTP_CACHE_DIR") or os.path.join(USER_CACHE_DIRECTORY, "btcmap-http")
+# BTCMAP_HTTP_CACHE=0 turns the cache off, BTCMAP_HTTP_CACHE_TTL (seconds) overrides every TTL below
+CACHE_ENABLED = os.getenv("BTCMAP_HTTP_CACHE", "1") not in ("0", "false", "off", "no")
+CACHE_TTL_OVERRIDE = os.getenv("BTCMAP_HTTP_CACHE_TTL")
+CACHE_HOSTS = ("api.btcmap.org",)
+# Listing path and TTL in seconds, reports are generated daily and areas change rarely.
+# The unversioned /areas and /elements are still used by a few scripts. Only the listings themselves are cached,
+# single records such as /v3/areas/{id} are lookups where a stale answer (a 404 for a new area) would mislead
+CACHE_RULES = [
+    ("/v3/areas", 60 * 60),
+    ("/areas", 60 * 60),
+    ("/v3/reports", 60 * 60),
+    ("/v2/elements", 15 * 60),
+    ("/v3/elements", 15 * 60),
+    ("/elements", 15 * 60),
+]
+COMPRESS_LEVEL = 6
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_url(url, params=None):
+    """The URL with params merged in, scheme and host lowercased and the query sorted."""
+    prepared = requests.Request("GET", url, params=params).prepare().url
+    parts = urlsplit(prepared)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def rule_ttl(url):
+    """TTL for a normalized URL, None when the URL is not cached."""
+    parts = urlsplit(url)
+    if parts.hostname not in CACHE_HOSTS:
+        return None
+    path = parts.path.rstrip("/")
+    for listing_path, ttl in CACHE_RULES:
+        if path == listing_path:
+            return int(CACHE_TTL_OVERRIDE) if CACHE_TTL_OVERRIDE else ttl
+    return None
+
+
+class HttpCache:
+    """Conditional-request cache of GET responses in directory."""
+
+    def __init__(self, directory=CACHE_DIRECTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key):
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.gz")
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return entry if os.path.exists(body_path) else None
+
+    def _save_meta(self, key, entry):
+        meta_path, _ = self._paths(key)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(entry, file)
+        os.replace(temp_path, meta_path)
+
+    def _store(self, key, url, response):
+        # The decoded body is spooled to disk chunk by chunk, so large listings never sit in memory
+        _, body_path = self._paths(key)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as raw_file, gzip.GzipFile(fileobj=raw_file, mode="wb", compresslevel=COMPRESS_LEVEL) as file:
+                for chunk in response.iter_content(SPOOL_CHUNK_SIZE):
+                    file.write(chunk)
+            os.replace(temp_path, body_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        finally:
+            response.close()
+        entry = {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+        }
+        self._save_meta(key, entry)
+        return entry
+
+    def _response(self, key, entry, stream):
+        # A regular Response backed by the cached body, iter_content, json and text all work on it
+        _, body_path = self._paths(key)
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = entry["url"]
+        headers = {"Content-Type": entry["content_type"]} if entry.get("content_type") else {}
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = gzip.open(body_path, "rb")
+        response.from_cache = True
+        if not stream:
+            response.content
+            response.raw.close()
+        return response
+
+    def get(self, session, url, params=None, headers=None, stream=False, ttl=None, **kwargs):
+        """GET through the cache, ttl overrides the endpoint's TTL (0 always revalidates)."""
+        normalized = normalize_url(url, params)
+        if ttl is None:
+            ttl = rule_ttl(normalized)
+        if ttl is None:
+            return session.get(url, params=params, headers=headers, stream=stream, **kwargs)
+
+        headers = dict(headers or {})
+        # Authenticated responses may differ, keep them apart from anonymous ones
+        key_source = normalized + "\n" + headers.get("Authorization", "")
+        key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+        entry = self._load(key)
+        if entry and time.time() - entry["stored_at"] < ttl:
+            return self._response(key, entry, stream)
+
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = session.get(url, params=params, headers=headers, stream=True, **kwargs)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"Warning: {normalized} failed ({e}), using the cached response from {format_age(entry)}", file=sys.stderr)
+            return self._response(key, entry, stream)
+
+        if response.status_code == 304 and entry:
+            response.close()
+            entry["stored_at"] = time.time()
+            self._save_meta(key, entry)
+            return self._response(key, entry, stream)
+        if response.status_code >= 500 and entry:
+            response.close()
+            print(f"Warning: {normalized} returned {response.status_code}, using the cached response from {format_age(entry)}", file=sys.stderr)
+            return self._response(key, entry, stream)
+        # Only a 200 is stored, errors and redirects are passed through untouched
+        if response.status_code != 200:
+            if not stream:
+                response.content
+            return response
+        return self._response(key, self._store(key, normalized, response), stream)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+
+def format_age(entry):
+    minutes = int((time.time() - entry["stored_at"]) // 60)
+    return f"{minutes} minutes ago" if minutes < 120 else f"{minutes // 60} hours ago"
+
+
+shared_cache = None
+shared_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide cache, None when BTCMAP_HTTP_CACHE turns it off."""
+    global shared_cache
+    if not CACHE_ENABLED:
+        return None
+    if shared_cache is None:
+        with shared_cache_lock:
+            if shared_cache is None:
+                shared_cache = HttpCache()
+    return shared_cache
@@ -0,0 +1,121 @@
+#Streaming reads of BTC Map API listings.
+#A JSON array is decoded item by item as its text arrives, so only the item being decoded (and at most as much
+#text again) is held in memory. iter_updated_since pages through a v3 endpoint with updated_since as the cursor.
+
+import codecs
+import json
+import sys
+from itertools import chain
+
+from btcmap import client
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(text_chunks):
+    """Yield the items of a top-level JSON array as its text arrives, without holding the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    # Chunks that arrived since the last decode attempt, joined only when it is worth trying again
+    pending = []
+    pending_size = 0
+    retry_size = 0
+
+    # None marks the end of the text, so whatever is left is decoded one last time
+    for chunk in chain(text_chunks, [None]):
+        final = chunk is None
+        if not final:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if len(buffer) - position + pending_size < retry_size:
+                continue
+        buffer = buffer[position:] + "".join(pending)
+        position = 0
+        pending = []
+        pending_size = 0
+        retry_size = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[position:position + 50]!r}")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    break
+                # The item continues in a later chunk. Decoding restarts from the item's first character,
+                # so wait until the unparsed text has doubled, which keeps a large item linear overall
+                retry_size = 2 * (len(buffer) - position)
+                break
+            if not final:
+                # A number cut short by the chunk ("12" of 1234, "1." of 1.5) still decodes, so an item only
+                # counts once the comma or bracket after it has arrived
+                following = end
+                while following < len(buffer) and buffer[following] in " \t\r\n":
+                    following += 1
+                if following == len(buffer) or buffer[following] not in ",]":
+                    retry_size = len(buffer) - position + 1
+                    break
+            position = end
+            yield item
+
+    raise ValueError("Unexpected end of JSON array")
+
+
+def iter_text(byte_chunks):
+    """Decode UTF-8 byte chunks without splitting multi-byte characters."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in byte_chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_response_items(response):
+    """Yield the items of a streamed response holding a JSON array."""
+    return iter_json_array(iter_text(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+
+
+def iter_updated_since(url, updated_since, page_limit, **kwargs):
+    """Yield every record of the listing at url updated after updated_since, streaming each page.
+
+    A record updated while the listing is paged can be yielded twice, callers keep the last one per id.
+    Raises requests.RequestException when a page cannot be fetched and ValueError when it is not a JSON array.
+    """
+    cursor = updated_since
+    while True:
+        response = client.get(url, params={"updated_since": cursor, "limit": page_limit}, stream=True, **kwargs)
+        response.raise_for_status()
+
+        count = 0
+        updated_at_values = set()
+        for record in iter_response_items(response):
+            count += 1
+            updated_at_values.add(record['updated_at'])
+            yield record
+
+        if count < page_limit:
+            return
+
+        # updated_since is exclusive and a full page may stop part way through its last timestamp,
+        # so resume from the one before it
+        last_updated_at = max(updated_at_values)
+        earlier_updated_at = [updated_at for updated_at in updated_at_values if updated_at < last_updated_at]
+        if not earlier_updated_at:
+            print(f"Warning: {page_limit}+ records of {url} share updated_at {last_updated_at}, some may be missed", file=sys.stderr)
+            return
+        cursor = max(earlier_updated_at)
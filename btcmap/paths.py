@@ -0,0 +1,13 @@
+#Where the scripts keep files they can rebuild, outside the source tree so nothing generated ends up in git.
+#BTCMAP_CACHE_DIR overrides the directory, otherwise it is btcmap under XDG_CACHE_HOME (~/.cache).
+
+import os
+
+USER_CACHE_DIRECTORY = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+CACHE_DIRECTORY = os.getenv("BTCMAP_CACHE_DIR") or os.path.join(USER_CACHE_DIRECTORY, "btcmap")
+
+
+def cache_file(file_name):
+    """Path of file_name in the cache directory, the directory is created when it is missing."""
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    return os.path.join(CACHE_DIRECTORY, file_name)
@@ -0,0 +1,141 @@
+#Levels of detail for area GeoJSON.
+#Each level is named after the web map zoom it is meant for. Polygons are simplified with topology-preserving
+#Douglas-Peucker at a tolerance of one pixel at that zoom, then snapped to a grid with as many decimals as the
+#pixel size needs, so rings never cross or collapse into invalid shapes and the JSON carries no noise digits.
+#
+#Usage:
+#    python -m btcmap.simplify FILE [FILE ...] [--zoom Z [Z ...]]
+#
+#Prints the vertex and byte reduction of each level for GeoJSON files, e.g. the Natural Earth country borders.
+
+import argparse
+import json
+import math
+import sys
+
+import shapely
+from shapely.geometry import MultiPolygon, Polygon, mapping, shape
+from shapely.geometry.polygon import orient
+
+from btcmap.geometry import pack_rings
+
+DEFAULT_ZOOMS = [12, 8, 4]
+TILE_SIZE = 256
+
+
+def zoom_tolerance(zoom):
+    """Degrees covered by one pixel at the equator at this zoom."""
+    return 360 / (TILE_SIZE * 2 ** zoom)
+
+
+def zoom_precision(zoom):
+    """Decimals that keep coordinates within a tenth of a pixel at this zoom."""
+    return max(0, math.ceil(-math.log10(zoom_tolerance(zoom)))) + 1
+
+
+def level_name(zoom):
+    return f"z{zoom}"
+
+
+def _polygonal(geometry):
+    # Invalid hand-drawn polygons are repaired first, anything that is not a polygon is dropped
+    if not geometry.is_valid:
+        geometry = shapely.make_valid(geometry)
+    polygons = [part for part in shapely.get_parts(geometry) if isinstance(part, Polygon) and not part.is_empty]
+    if not polygons:
+        return None
+    return polygons[0] if len(polygons) == 1 else MultiPolygon(polygons)
+
+
+def _oriented(geometry):
+    # Outer rings counter-clockwise and holes clockwise, the right-hand rule of RFC 7946
+    if isinstance(geometry, Polygon):
+        return orient(geometry, 1.0)
+    return MultiPolygon([orient(polygon, 1.0) for polygon in geometry.geoms])
+
+
+def _rounded(coordinates, digits):
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, digits) for value in coordinates]
+    return [_rounded(part, digits) for part in coordinates]
+
+
+def simplify_geometry(geometry, zoom):
+    """Simplified and quantized copy of a Polygon or MultiPolygon GeoJSON geometry, None if nothing is left at this zoom."""
+    polygons = _polygonal(shape(geometry))
+    if polygons is None:
+        return None
+    simplified = polygons.simplify(zoom_tolerance(zoom), preserve_topology=True)
+    # Snapping to the grid keeps the result valid and drops rings smaller than a grid cell
+    snapped = _polygonal(shapely.set_precision(simplified, 10 ** -zoom_precision(zoom)))
+    if snapped is None:
+        return None
+    result = mapping(_oriented(snapped))
+    return {"type": result["type"], "coordinates": _rounded(result["coordinates"], zoom_precision(zoom))}
+
+
+def simplify_geo_json(geo_json, zoom):
+    """simplify_geometry for a geometry, Feature or FeatureCollection, keeping the wrapping as it is."""
+    geo_json_type = geo_json.get("type")
+    if geo_json_type == "Feature":
+        geometry = simplify_geometry(geo_json["geometry"], zoom) if geo_json.get("geometry") else None
+        return dict(geo_json, geometry=geometry) if geometry else None
+    if geo_json_type == "FeatureCollection":
+        features = [simplify_geo_json(feature, zoom) for feature in geo_json.get("features", [])]
+        features = [feature for feature in features if feature]
+        return dict(geo_json, features=features) if features else None
+    return simplify_geometry(geo_json, zoom)
+
+
+def levels_of_detail(geo_json, zooms=DEFAULT_ZOOMS):
+    """{level name: simplified geo_json}, finest zoom first.
+
+    A level where the area would vanish (a small island at zoom 4) reuses the next finer level instead.
+    """
+    levels = {}
+    previous = geo_json
+    for zoom in sorted(zooms, reverse=True):
+        simplified = simplify_geo_json(geo_json, zoom)
+        previous = simplified if simplified is not None else previous
+        levels[level_name(zoom)] = previous
+    return levels
+
+
+def geo_json_size(geo_json):
+    """(vertices, bytes of compact JSON) of a geo_json."""
+    coordinates, _, _, _ = pack_rings([geo_json])
+    return len(coordinates), len(json.dumps(geo_json, separators=(",", ":")))
+
+
+def format_report(label, geo_json, levels):
+    """One line per level with its vertex and byte reduction against the full geo_json."""
+    full_vertices, full_bytes = geo_json_size(geo_json)
+    lines = [f"{label}: {full_vertices} vertices, {full_bytes / 1024:.1f} KB"]
+    for name, simplified in levels.items():
+        vertices, size = geo_json_size(simplified)
+        vertex_reduction = 100 * (1 - vertices / full_vertices) if full_vertices else 0
+        byte_reduction = 100 * (1 - size / full_bytes) if full_bytes else 0
+        lines.append(f"  {name:>4}: {vertices} vertices (-{vertex_reduction:.1f}%), "
+                     f"{size / 1024:.1f} KB (-{byte_reduction:.1f}%)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vertex and byte reduction of each level of detail for GeoJSON files")
+    parser.add_argument("files", nargs="+", help="GeoJSON geometry, Feature or FeatureCollection files")
+    parser.add_argument("--zoom", type=int, nargs="+", default=DEFAULT_ZOOMS,
+                        help=f"Zoom levels to simplify for (default: {' '.join(map(str, DEFAULT_ZOOMS))})")
+    args = parser.parse_args()
+
+    for file_name in args.files:
+        try:
+            with open(file_name, "r") as file:
+                geo_json = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {file_name}: {e}", file=sys.stderr)
+            continue
+        print(format_report(file_name, geo_json, levels_of_detail(geo_json, args.zoom)))
+
+
+if __name__ == "__main__":
+    main()
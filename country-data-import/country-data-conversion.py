@@ -2,9 +2,12 @@
 #The area of the GeoJSON is calculated in KM^2 at the same time.
 
 import os
+import sys
 import json
-from area import area
 from geojson_rewind import rewind
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap.geometry import geodesic_area
+from btcmap.simplify import format_report, level_name, levels_of_detail
 
 # Set the working directory to the script's directory
 script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -16,13 +19,16 @@ input_directory_path = 'input/geojson-regions-50m'
 # Specify the output directory where you want to save the JSON files
 output_directory_path = 'output/btcmap-areas-50m'
 
+# Zoom levels to also write a simplified geo_json for, as geo_json:z<zoom> tags next to the full one, e.g. [8, 4]
+simplified_zooms = []
+
 # Function to extract elements from a GeoJSON feature
 def extract_elements(feature) -> None:
     # Convert "id" to lowercase
     id_lower = feature["properties"].get("iso_a2", "").lower()
 
     # Calculate the area of the geometry
-    area_m2 = area(feature["geometry"])
+    area_m2 = geodesic_area(feature["geometry"])
     area_km2 = round((area_m2 / 1_000_000),2)
 
     #Ensure imported GeoJSON follows the RHR
@@ -57,6 +63,13 @@ def extract_elements(feature) -> None:
         }
     }
     
+    # Add the lightweight variants and report how much each one saves
+    if simplified_zooms:
+        levels = levels_of_detail(geo_json, simplified_zooms)
+        print(format_report(id_lower, geo_json, levels))
+        for zoom in simplified_zooms:
+            extracted_feature["tags"][f"geo_json:{level_name(zoom)}"] = levels[level_name(zoom)]
+
     return extracted_feature
 
 # Iterate through files in the directory
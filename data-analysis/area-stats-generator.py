@@ -1,24 +1,43 @@
 import requests
-import csv
 import os
 import sys
-from datetime import datetime
+import argparse
+from urllib.parse import quote
 import json
 #import matplotlib.pyplot as plt
 import math
+from area_scoring import DEFAULT_STRATEGY, SCORING_STRATEGIES, compare_area_groups, score_area_groups
+from area_output import OUTPUT_FORMATS, write_outputs, write_score_comparison
+from epoch_days import parse_epoch_day, epoch_day_to_date
+from report_store import ReportStore, is_store_current, write_report_store
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+from btcmap.listing import STREAM_CHUNK_SIZE, iter_json_array, iter_response_items, iter_updated_since
 
 # Global query parameters
 UPDATED_SINCE_DATE = "2022-10-11T00:00:00.000Z"
 QUERY_LIMIT = "100000"
 REPORTS_SINCE_DATE = "2022-10-01T00:00:00.000Z"
 
+# Incremental sync parameters
+SYNC_STATE_FILE = "sync_state.json"
+SYNC_PAGE_LIMIT = 5000
+
 class Area:
+    # Only the fields the metrics and CSVs use are kept. The tags dict, and the geo_json polygons in it,
+    # is not held on to, so geometry is released as soon as the area is built
+    __slots__ = (
+        'id', 'alias', 'name', 'reports', 'latest_report', 'population', 'area_km2',
+        'merchants_per_capita', 'merchants_per_km2', 'average_verification_age',
+        'weighted_average_verification_age', 'total_merchants', 'weighted_total_merchants', 'score',
+    )
+
     def __init__(self, id, tags) -> None:
         self.id = id
         self.alias = tags.get('url_alias')
         self.name = tags.get('name')
-        self.tags = tags
         self.reports = []
+        self.latest_report = None
         self.population = tags.get('population')
         self.area_km2 = tags.get('area_km2')
         self.merchants_per_capita = None
@@ -31,41 +50,41 @@ class Area:
 
     def add_report(self, report):
         self.reports.append(report)
+        # Track the latest report as reports arrive, only a strictly newer date replaces it so ties keep the first one
+        if self.latest_report is None or report.date > self.latest_report.date:
+            self.latest_report = report
 
     def get_latest_report(self):
-        if self.reports:
-            return max(self.reports, key=lambda report: report.date)
+        return self.latest_report
+
+    def keep_latest_report(self, report):
+        if self.latest_report is None or report.date > self.latest_report.date:
+            self.reports = [report]
+            self.latest_report = report
 
 class Report:
+    __slots__ = (
+        'id', 'date', 'average_verification_date', 'grade', 'legacy_elements', 'outdated_elements',
+        'total_elements', 'total_elements_lightning', 'total_elements_lightning_contactless',
+        'total_elements_onchain', 'total_elements_atms', 'up_to_date_elements', 'up_to_date_percent',
+    )
+
     def __init__(self, report_data):
+        tags = report_data['tags']
         self.id = report_data['id']
-        self.date = report_data['date']
-        self.average_verification_date = self.parse_date(report_data['tags'].get('avg_verification_date'))
-        self.grade = report_data['tags'].get('grade')
-        self.legacy_elements = report_data['tags'].get('legacy_elements')
-        self.outdated_elements = report_data['tags'].get('outdated_elements')
-        self.total_elements = report_data['tags'].get('total_elements')
-        self.total_elements_lightning = report_data['tags'].get('total_elements_lightning')
-        self.total_elements_lightning_contactless = report_data['tags'].get('total_elements_lightning_contactless')
-        self.total_elements_onchain = report_data['tags'].get('total_elements_onchain')
-        self.total_elements_atms = report_data['tags'].get('total_atms')
-        self.up_to_date_elements = report_data['tags'].get('up_to_date_elements')
-        self.up_to_date_percent = report_data['tags'].get('up_to_date_percent')
-
-    def parse_date(self, date_string):
-        if date_string:
-
-            #Terrible hack because strptime is not handling 9 point decimal seconds well.
-            date_only = date_string.split('T')[0]
-
-            date_formats = ['%Y-%m-%d']
-
-            for date_format in date_formats:
-                try:
-                    return datetime.strptime(date_only, date_format)
-                except ValueError:
-                    print(f"Failed to parse {date_only} with format {date_format}")
-        return None
+        # Dates are epoch days, see epoch_days.py
+        self.date = parse_epoch_day(report_data['date'])
+        self.average_verification_date = parse_epoch_day(tags.get('avg_verification_date'))
+        self.grade = tags.get('grade')
+        self.legacy_elements = tags.get('legacy_elements')
+        self.outdated_elements = tags.get('outdated_elements')
+        self.total_elements = tags.get('total_elements')
+        self.total_elements_lightning = tags.get('total_elements_lightning')
+        self.total_elements_lightning_contactless = tags.get('total_elements_lightning_contactless')
+        self.total_elements_onchain = tags.get('total_elements_onchain')
+        self.total_elements_atms = tags.get('total_atms')
+        self.up_to_date_elements = tags.get('up_to_date_elements')
+        self.up_to_date_percent = tags.get('up_to_date_percent')
 
 # Function to check if a JSON file exists and load data from it
 def load_json_from_file(file_name):
@@ -78,19 +97,97 @@ def load_json_from_file(file_name):
 
 # Function to save JSON data to a file
 def save_json_to_file(data, file_name):
-    with open(file_name, 'w') as file:
+    # Write next to the target and swap it in, so an interrupted run never leaves a truncated cache
+    temp_file_name = f"{file_name}.tmp"
+    with open(temp_file_name, 'w') as file:
         json.dump(data, file)
+    os.replace(temp_file_name, file_name)
+
+# Function to stream the items of a cached JSON array file
+def iter_json_file(file_name):
+    with open(file_name, 'r') as file:
+        yield from iter_json_array(iter(lambda: file.read(STREAM_CHUNK_SIZE), ''))
+
+# Function to write records to a JSON array file while passing them on, the file only replaces
+# the cache once every record has been written
+def tee_records_to_file(records, file_name):
+    temp_file_name = f"{file_name}.tmp"
+    count = 0
+    with open(temp_file_name, 'w') as file:
+        file.write('[')
+        for record in records:
+            if count:
+                file.write(', ')
+            file.write(json.dumps(record))
+            count += 1
+            yield record
+        file.write(']')
+    os.replace(temp_file_name, file_name)
+    print(f"Streamed {count} records into {file_name}")
+
+# Function to page through a v3 endpoint using updated_at as the cursor
+def fetch_updated_since(endpoint, updated_since, page_limit=SYNC_PAGE_LIMIT):
+    url = f"https://api.btcmap.org/v3/{endpoint}"
+    headers = {
+        'Accept': 'application/json'
+    }
+
+    print(f"Fetching {endpoint} updated since {updated_since} from {url}")
+    # Records seen on two pages are upserted by id in merge_records
+    try:
+        return list(iter_updated_since(url, updated_since, page_limit, headers=headers))
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error fetching {endpoint}: {e}")
+        sys.exit(1)
+
+# Function to apply upserts and deleted_at tombstones to cached records
+def merge_records(cached_records, changed_records):
+    records_by_id = {record['id']: record for record in cached_records}
+    for record in changed_records:
+        if record.get('deleted_at') is not None:
+            records_by_id.pop(record['id'], None)
+        else:
+            records_by_id[record['id']] = record
+    return list(records_by_id.values())
+
+# Function to bring a cache file up to date with only the records changed since the last sync
+def sync_cache(file_name, endpoint, initial_updated_since):
+    sync_state = load_json_from_file(SYNC_STATE_FILE) or {}
+    records = load_json_from_file(file_name)
+
+    if records is None:
+        print(f"No cached {file_name} found, fetching everything since {initial_updated_since}...")
+        records = []
+        updated_since = initial_updated_since
+    else:
+        # Caches written before sync existed have no stored cursor, so recover it from the records
+        updated_since = sync_state.get(file_name) or max(
+            (record['updated_at'] for record in records if record.get('updated_at')), default=initial_updated_since)
+        print(f"Syncing {file_name} with changes since {updated_since}...")
 
-def get_areas():
+    changed_records = fetch_updated_since(endpoint, updated_since)
+    records = merge_records(records, changed_records)
+    save_json_to_file(records, file_name)
+
+    sync_state[file_name] = max(
+        [updated_since] + [record['updated_at'] for record in changed_records if record.get('updated_at')])
+    save_json_to_file(sync_state, SYNC_STATE_FILE)
+
+    print(f"Synced {file_name}: {len(changed_records)} changed records, {len(records)} cached")
+    return records
+
+def get_areas(sync=False):
 
     # Check if areas.json exists and load data
-    areas = load_json_from_file('areas.json')
+    if sync:
+        areas = sync_cache('areas.json', 'areas', UPDATED_SINCE_DATE)
+    else:
+        areas = load_json_from_file('areas.json')
 
     if areas is None:
         print("No cached areas.json found, making API call...")
         # areas.json doesn't exist, make API call and save data to the file
 
-        from urllib.parse import quote
         date = quote(UPDATED_SINCE_DATE)
         url = f"https://api.btcmap.org/v3/areas?updated_since={date}&limit={QUERY_LIMIT}"
         headers = {
@@ -98,7 +195,7 @@ def get_areas():
         }
 
         print(f"Making request to URL: {url}")
-        response = requests.get(url, headers=headers)
+        response = client.get(url, headers=headers)
         print(f"Response status code: {response.status_code}")
         print(f"Response headers: {response.headers}")
 
@@ -110,8 +207,8 @@ def get_areas():
             print(f"Response content: {response.text}")
             sys.exit(1)
 
-    # Save the data to areas.json
-    save_json_to_file(areas, 'areas.json')
+        # Save the data to areas.json
+        save_json_to_file(areas, 'areas.json')
 
     global_area = []
     country_areas = []
@@ -139,6 +236,10 @@ def get_areas():
             area = Area(id, tags)
             other_areas.append(area)
 
+        # Area does not keep its tags, so show them here while they are still around
+        if area.name is None:
+            print(f"Area tags for ID {area.id}: { {key: value for key, value in tags.items() if key != 'geo_json'} }")
+
     #Create a global area
     global_json = """
     {
@@ -156,8 +257,49 @@ def get_areas():
     return global_area, country_areas, community_areas, other_areas
 
 
-def get_reports(areas):
-    reports = load_json_from_file('reports.json')
+def normalize_area_id(area_id):
+    # Area ids arrive as ints, numeric strings or "" (the synthetic global area), map them to one int key
+    if area_id is None or area_id == "":
+        return 0
+    return int(area_id)
+
+def build_area_index(areas):
+    # Several areas can share an id (e.g. the global area), so each key holds a list
+    area_index = {}
+    for area in areas:
+        area_index.setdefault(normalize_area_id(area.id), []).append(area)
+    return area_index
+
+# Function to stream reports from the cache or the API without holding the whole list
+def stream_reports():
+    if os.path.exists('reports.json'):
+        return iter_json_file('reports.json')
+
+    print("No cached reports.json found, streaming from the API...")
+    url = f"https://api.btcmap.org/v3/reports?updated_since={REPORTS_SINCE_DATE}&limit={QUERY_LIMIT}"
+    headers = {
+        'Accept': 'application/json'
+    }
+
+    print(f"Making request to URL: {url}")
+    response = client.get(url, headers=headers, stream=True)
+    print(f"Response status code: {response.status_code}")
+
+    if response.status_code != 200:
+        print(f"Response content: {response.text}")
+        sys.exit(1)
+
+    reports = iter_response_items(response)
+    return tee_records_to_file(reports, 'reports.json')
+
+def load_reports(sync=False, stream=False):
+    if sync:
+        # The delta is merged into the cache in memory, so syncing does not stream
+        reports = sync_cache('reports.json', 'reports', REPORTS_SINCE_DATE)
+    elif stream:
+        return stream_reports()
+    else:
+        reports = load_json_from_file('reports.json')
 
     if reports is None:
         print("No cached reports.json found, making API call...")
@@ -168,7 +310,7 @@ def get_reports(areas):
         }
 
         print(f"Making request to URL: {url}")
-        response = requests.get(url, headers=headers)
+        response = client.get(url, headers=headers)
         print(f"Response status code: {response.status_code}")
         print(f"Response headers: {response.headers}")
 
@@ -180,104 +322,63 @@ def get_reports(areas):
             print(f"Response content: {response.text}")
             sys.exit(1)
 
-    # Save the data to areas.json
-    save_json_to_file(reports, 'reports.json')
-
-    for report in reports:
-        area_id = report.get('area_id')
-
-        if area_id:
-            for area in areas:
-                # Handle both empty strings and numeric IDs
-                if area.id == "" and area_id == 0:
-                    area.add_report(Report(report))
-                elif area.id != "" and area_id == int(area.id):
-                    area.add_report(Report(report))
-
-def calculate_metrics(areas):
-    for area in areas:
-        latest_report = area.get_latest_report()
-        if latest_report:
-            # Calculate total *merchants*, excluding ATMs
-            area.total_merchants = latest_report.total_elements - latest_report.total_elements_atms
-
-            # Calculate weighted merchants
-            area.weighted_total_merchants = area.total_merchants * (latest_report.up_to_date_percent / 100)
-
-            # Calculate average verification age
-            if latest_report.average_verification_date:
-                current_date = datetime.now()
-                area.average_verification_age = (current_date - latest_report.average_verification_date).days
-            else:
-                area.average_verification_age = None
-
-            # Calculate a weighted average verification age assuming all outdated elements do not have an average verification date
-            average_outdated_element_age = 1 * 365  # This should be modified in time to use the last date a bitcoin tag was added to an element should a verification date not be present. This will get more inaccurate over time from Nov 2023, which is 12-months after the verification tags started being added
-
-            if (latest_report.up_to_date_elements is not None and area.average_verification_age is not None and latest_report.outdated_elements is not None):
-                weighted_average_verification_age = ((latest_report.up_to_date_elements * area.average_verification_age) + (latest_report.outdated_elements * average_outdated_element_age)) / latest_report.total_elements if latest_report.total_elements > 0 else None
-                area.weighted_average_verification_age = weighted_average_verification_age
-            else:
-                area.weighted_average_verification_age = None
-
-            # Calculate merchant density per capita
-            if area.population and area.population != '0':
-                area.merchants_per_capita = area.total_merchants / float(area.population)
-            else:
-                area.merchants_per_capita = None
+        # Save the data to reports.json
+        save_json_to_file(reports, 'reports.json')
 
-            # Calculate merchant density per km2
-            if area.area_km2 and area.area_km2 != '0':
-                area.merchants_per_km2 = area.total_merchants / area.area_km2
-            else:
-                area.merchants_per_km2 = None
+    return reports
 
+def get_reports(areas, latest_only=False, sync=False, stream=False):
+    join_reports(areas, load_reports(sync, stream), latest_only)
 
-            # Calculate area score based on weighted total merchants and relative size
-
-            # Filter areas with valid weighted_total_merchants and area_km2
-            valid_areas = [area for area in areas if area.weighted_total_merchants is not None and area.area_km2 is not None]
-
-            if valid_areas:
-                max_weighted_total_merchants = max(area.weighted_total_merchants for area in valid_areas)
-                max_area_size = max(area.area_km2 for area in valid_areas)
-            else:
-                max_weighted_total_merchants = 0  # Handle the case when there are no valid values
-                max_area_size = 0  # Handle the case when there are no valid values
+def join_reports(areas, reports, latest_only=False):
+    area_index = build_area_index(areas)
 
-            if max_weighted_total_merchants != 0:  # Check if max_weighted_total_merchants is not 0
-                weighted_total_merchants_normalized = area.weighted_total_merchants / max_weighted_total_merchants
-            else:
-                weighted_total_merchants_normalized = 0  # Handle the division by zero case
+    for report in reports:
+        area_id = report.get('area_id')
 
-            if max_area_size != 0:  # Check if max_area_size is not 0
-                # Check for None values and set them to 0
-                area_size_normalized = 1 - (area.area_km2 or 0) / max_area_size  # Larger areas get smaller weights
+        if area_id:
+            matched_areas = area_index.get(normalize_area_id(area_id))
+            if not matched_areas:
+                continue
+
+            if latest_only:
+                # Skip building a Report unless it would replace what we hold
+                if all(area.latest_report and parse_epoch_day(report['date']) <= area.latest_report.date for area in matched_areas):
+                    continue
+                parsed_report = Report(report)
+                for area in matched_areas:
+                    area.keep_latest_report(parsed_report)
             else:
-                area_size_normalized = 0  # Handle the division by zero case
-
-            # Adjust these weight values as needed
-            weight_weighted_total_merchants = 0.7
-            weight_area_size = 0.3
-
-            score = (
-                (weight_weighted_total_merchants * weighted_total_merchants_normalized) +
-                (weight_area_size * area_size_normalized)
-            )
-
-            area.score = score
-
-
-
+                parsed_report = Report(report)
+                for area in matched_areas:
+                    area.add_report(parsed_report)
 
+def get_reports_from_store(areas, store_dir, sync=False, stream=False):
+    # Rebuild the columnar store only when reports.json has changed since it was written
+    if sync or not is_store_current(store_dir, 'reports.json'):
+        print(f"Building report store in {store_dir}...")
+        write_report_store(load_reports(sync, stream), store_dir, source_file='reports.json')
 
+    store = ReportStore(store_dir)
+    print(f"Loaded report store with {len(store)} reports")
 
+    for area in areas:
+        area_key = normalize_area_id(area.id)
+        report_data = store.latest_report_data(area_key) if area_key else None
+        if report_data:
+            area.keep_latest_report(Report(report_data))
 
+def calculate_metrics(*area_groups, strategy=DEFAULT_STRATEGY, compare=False):
+    # Each group (global, countries, communities, others) is normalised against itself
+    # With compare, every strategy is scored and the comparison rows are returned
+    if compare:
+        return compare_area_groups(*area_groups, strategy=strategy)
+    score_area_groups(*area_groups, strategy=strategy)
 
 
 def plot_total_elements_over_time(areas):
     for area in areas:
-        x = [report.date for report in area.reports]
+        x = [epoch_day_to_date(report.date) for report in area.reports]
         y = [report.total_elements for report in area.reports]
         plt.plot(x, y, label=area.id)
 
@@ -293,105 +394,56 @@ def plot_total_elements_over_time(areas):
     #plt.show()  # Optionally display the chart on the screen
 
 
-def write_to_csv(areas, csv_file_path):
-    # Debug logging for areas with None names
-    for area in areas:
-        if area.name is None:
-            print(f"Area with ID {area.id} has no name tag")
-            print(f"Area tags: {area.tags}")
-            
-    with open(csv_file_path, mode="w", newline="") as csv_file:
-        sample_row = areas[0] if areas else None
-        fieldnames = [
-            "id",
-            "name",
-            "Weighted Average Verification Age (Days)",
-            "Merchants per Capita",
-            "Merchants per km²",
-            "Score",
-            "population",
-            "area_km2",
-            "total_merchants",
-            "weighted_total_merchants",
-            "up_to_date_elements",
-            "up_to_date_percent",
-            "Average Verification Age (Days)",
-            "id (Latest Report)",
-            "date",
-            "average_verification_date",
-            "grade",
-            "legacy_elements",
-            "outdated_elements",
-            "total_elements",
-            "total_elements_atms",
-            "total_elements_lightning",
-            "total_elements_lightning_contactless",
-            "total_elements_onchain"
-        ]
-
-        csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        csv_writer.writeheader()
-
-        for area in areas:
-            latest_report = area.get_latest_report()
-            print(f"Area {area.name}: has latest report: {latest_report is not None}")
-            if latest_report:
-                # Create a new dictionary containing the specified fields
-                row = {
-                    "id": area.id,
-                    "name": area.name,
-                    "population": area.population,
-                    "Weighted Average Verification Age (Days)": round(area.weighted_average_verification_age, 2) if area.weighted_average_verification_age is not None else 0,
-                    "Merchants per Capita": "{:.10f}".format(area.merchants_per_capita) if area.merchants_per_capita is not None else 0,
-                    "Merchants per km²": "{:.10f}".format(area.merchants_per_km2) if area.merchants_per_km2 is not None else 0,
-                    "Score": area.score,
-                    "area_km2": area.area_km2,
-                    "total_merchants": area.total_merchants,
-                    "weighted_total_merchants": area.weighted_total_merchants,
-                    "up_to_date_elements": latest_report.up_to_date_elements,
-                    "up_to_date_percent": latest_report.up_to_date_percent,
-                    "Average Verification Age (Days)": str(area.average_verification_age),
-                    "id (Latest Report)": latest_report.id,
-                    "date": latest_report.date,
-                    "average_verification_date": latest_report.average_verification_date,
-                    "grade": latest_report.grade,
-                    "legacy_elements": latest_report.legacy_elements,
-                    "outdated_elements": latest_report.outdated_elements,
-                    "total_elements": latest_report.total_elements,
-                    "total_elements_atms": latest_report.total_elements_atms,
-                    "total_elements_lightning": latest_report.total_elements_lightning,
-                    "total_elements_lightning_contactless": latest_report.total_elements_lightning_contactless,
-                    "total_elements_onchain": latest_report.total_elements_onchain
-                }
-
-                csv_writer.writerow(row)
-
-
 def main():
+    parser = argparse.ArgumentParser(description="Generate BTC Map area stats CSVs")
+    parser.add_argument("--keep-history", action="store_true",
+                        help="Keep every report per area instead of only the latest one")
+    parser.add_argument("--sync", action="store_true",
+                        help="Fetch only areas and reports changed since the last run and merge them into the caches")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse reports incrementally from the download or cache instead of loading the whole list")
+    parser.add_argument("--store", metavar="DIR",
+                        help="Read latest reports from a memory-mapped columnar store in DIR, rebuilt when reports.json changes. "
+                             "The store only holds the latest report per area, so it cannot be combined with --keep-history")
+    parser.add_argument("--format", dest="formats", action="append", choices=list(OUTPUT_FORMATS),
+                        help="Output format, repeat for several (default: csv). parquet and arrow need pyarrow")
+    parser.add_argument("--verbose", action="store_true", help="Print a line for every area written")
+    parser.add_argument("--scoring", choices=list(SCORING_STRATEGIES), default=DEFAULT_STRATEGY,
+                        help=f"Scoring strategy for the Score column (default: {DEFAULT_STRATEGY})")
+    parser.add_argument("--compare-scores", action="store_true",
+                        help="Also write score_comparison.csv with every strategy's score and rank side by side")
+    args = parser.parse_args()
+    if args.store and args.keep_history:
+        parser.error("--store only reads the latest report per area and cannot be combined with --keep-history")
+
     # Set the working directory to the script's directory
     script_directory = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_directory)
 
-    global_area, country_areas, community_areas, other_areas = get_areas()
+    global_area, country_areas, community_areas, other_areas = get_areas(sync=args.sync)
 
-    get_reports(global_area + country_areas + community_areas + other_areas)
+    all_areas = global_area + country_areas + community_areas + other_areas
+    if args.store:
+        get_reports_from_store(all_areas, args.store, sync=args.sync, stream=args.stream)
+    else:
+        # Only the latest report feeds the CSVs, history is needed for plot_total_elements_over_time
+        get_reports(all_areas, latest_only=not args.keep_history, sync=args.sync, stream=args.stream)
 
-    calculate_metrics(global_area)
-    calculate_metrics(country_areas)
-    calculate_metrics(community_areas)
-    calculate_metrics(other_areas)
+    comparison = calculate_metrics(global_area, country_areas, community_areas, other_areas,
+                                   strategy=args.scoring, compare=args.compare_scores)
 
     #plot_total_elements_over_time(community_areas)
 
-    global_csv_file_path = f"{script_directory}/global_stats.csv"
-    country_csv_file_path = f"{script_directory}/country_stats.csv"
-    community_csv_file_path = f"{script_directory}/community_stats.csv"
-    others_csv_file_path = f"{script_directory}/others_stats.csv"
+    write_outputs({
+        f"{script_directory}/global_stats": global_area,
+        f"{script_directory}/country_stats": country_areas,
+        f"{script_directory}/community_stats": community_areas,
+        f"{script_directory}/others_stats": other_areas,
+    }, output_formats=args.formats or ["csv"], verbose=args.verbose)
 
-    write_to_csv(global_area, global_csv_file_path)
-    write_to_csv(country_areas, country_csv_file_path)
-    write_to_csv(community_areas, community_csv_file_path)
-    write_to_csv(other_areas, others_csv_file_path)
+    if comparison:
+        write_score_comparison(f"{script_directory}/score_comparison.csv", comparison,
+                               ["global", "country", "community", "others"], list(SCORING_STRATEGIES))
 
     print("Data saved.")
 
@@ -0,0 +1,210 @@
+#Output stage for area-stats-generator.py.
+#The areas are walked once and each row is fanned out to the sinks of its category. Sinks write plain CSV,
+#gzip CSV or typed columnar files (Parquet or Arrow IPC, which need pyarrow).
+
+import csv
+import gzip
+import sys
+from epoch_days import epoch_day_to_iso
+
+FIELDNAMES = [
+    "id",
+    "name",
+    "Weighted Average Verification Age (Days)",
+    "Merchants per Capita",
+    "Merchants per km²",
+    "Score",
+    "population",
+    "area_km2",
+    "total_merchants",
+    "weighted_total_merchants",
+    "up_to_date_elements",
+    "up_to_date_percent",
+    "Average Verification Age (Days)",
+    "id (Latest Report)",
+    "date",
+    "average_verification_date",
+    "grade",
+    "legacy_elements",
+    "outdated_elements",
+    "total_elements",
+    "total_elements_atms",
+    "total_elements_lightning",
+    "total_elements_lightning_contactless",
+    "total_elements_onchain"
+]
+
+# Column types for the columnar outputs, dates are epoch days
+COLUMN_TYPES = {
+    "id": "int64",
+    "name": "string",
+    "Weighted Average Verification Age (Days)": "float64",
+    "Merchants per Capita": "float64",
+    "Merchants per km²": "float64",
+    "Score": "float64",
+    "population": "float64",
+    "area_km2": "float64",
+    "total_merchants": "int64",
+    "weighted_total_merchants": "float64",
+    "up_to_date_elements": "int64",
+    "up_to_date_percent": "float64",
+    "Average Verification Age (Days)": "int64",
+    "id (Latest Report)": "int64",
+    "date": "date32",
+    "average_verification_date": "date32",
+    "grade": "int64",
+    "legacy_elements": "int64",
+    "outdated_elements": "int64",
+    "total_elements": "int64",
+    "total_elements_atms": "int64",
+    "total_elements_lightning": "int64",
+    "total_elements_lightning_contactless": "int64",
+    "total_elements_onchain": "int64",
+}
+
+# Output formats and the file extension each one writes
+OUTPUT_FORMATS = {
+    "csv": "csv",
+    "csv.gz": "csv.gz",
+    "parquet": "parquet",
+    "arrow": "arrow",
+}
+
+
+def _to_number(value):
+    # Populations arrive as ints or numeric strings
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def build_record(area, latest_report):
+    # Typed values, each sink decides how to render them
+    return {
+        "id": int(area.id) if area.id != "" else 0,
+        "name": area.name,
+        "Weighted Average Verification Age (Days)": area.weighted_average_verification_age,
+        "Merchants per Capita": area.merchants_per_capita,
+        "Merchants per km²": area.merchants_per_km2,
+        "Score": area.score,
+        "population": area.population,
+        "area_km2": area.area_km2,
+        "total_merchants": area.total_merchants,
+        "weighted_total_merchants": area.weighted_total_merchants,
+        "up_to_date_elements": latest_report.up_to_date_elements,
+        "up_to_date_percent": latest_report.up_to_date_percent,
+        "Average Verification Age (Days)": area.average_verification_age,
+        "id (Latest Report)": latest_report.id,
+        "date": latest_report.date,
+        "average_verification_date": latest_report.average_verification_date,
+        "grade": latest_report.grade,
+        "legacy_elements": latest_report.legacy_elements,
+        "outdated_elements": latest_report.outdated_elements,
+        "total_elements": latest_report.total_elements,
+        "total_elements_atms": latest_report.total_elements_atms,
+        "total_elements_lightning": latest_report.total_elements_lightning,
+        "total_elements_lightning_contactless": latest_report.total_elements_lightning_contactless,
+        "total_elements_onchain": latest_report.total_elements_onchain
+    }
+
+
+def format_csv_row(area, record):
+    # The CSVs keep the text formatting they have always had
+    row = dict(record)
+    row["id"] = area.id
+    weighted_age = record["Weighted Average Verification Age (Days)"]
+    row["Weighted Average Verification Age (Days)"] = round(weighted_age, 2) if weighted_age is not None else 0
+    for name in ("Merchants per Capita", "Merchants per km²"):
+        row[name] = "{:.10f}".format(record[name]) if record[name] is not None else 0
+    row["Average Verification Age (Days)"] = str(record["Average Verification Age (Days)"])
+    row["date"] = epoch_day_to_iso(record["date"])
+    verification_date = record["average_verification_date"]
+    row["average_verification_date"] = f"{epoch_day_to_iso(verification_date)} 00:00:00" if verification_date is not None else None
+    return row
+
+
+class CsvSink:
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.file = gzip.open(path, "wt", newline="") if compress else open(path, mode="w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        self.writer.writeheader()
+
+    def write(self, area, record):
+        self.writer.writerow(format_csv_row(area, record))
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarSink:
+    def __init__(self, path, output_format):
+        try:
+            import pyarrow
+        except ImportError:
+            print(f"The {output_format} output needs pyarrow, install it with: pip install pyarrow")
+            sys.exit(1)
+        self.pyarrow = pyarrow
+        self.path = path
+        self.output_format = output_format
+        self.columns = {name: [] for name in FIELDNAMES}
+
+    def write(self, area, record):
+        for name in FIELDNAMES:
+            self.columns[name].append(record[name])
+
+    def close(self):
+        pa = self.pyarrow
+        self.columns["population"] = [_to_number(value) for value in self.columns["population"]]
+        self.columns["area_km2"] = [_to_number(value) for value in self.columns["area_km2"]]
+        schema = pa.schema([(name, getattr(pa, COLUMN_TYPES[name])()) for name in FIELDNAMES])
+        table = pa.table({name: pa.array(self.columns[name], type=schema.field(name).type) for name in FIELDNAMES}, schema=schema)
+
+        if self.output_format == "parquet":
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, self.path)
+        else:
+            import pyarrow.ipc
+            with pa.OSFile(self.path, "wb") as file, pyarrow.ipc.new_file(file, schema) as writer:
+                writer.write_table(table)
+
+
+def open_sink(path_stem, output_format):
+    path = f"{path_stem}.{OUTPUT_FORMATS[output_format]}"
+    if output_format == "csv":
+        return CsvSink(path)
+    if output_format == "csv.gz":
+        return CsvSink(path, compress=True)
+    return ColumnarSink(path, output_format)
+
+
+def write_outputs(categories, output_formats=("csv",), verbose=False):
+    # categories maps a path stem (e.g. .../country_stats) to its areas
+    for path_stem, areas in categories.items():
+        sinks = [open_sink(path_stem, output_format) for output_format in output_formats]
+        try:
+            for area in areas:
+                if area.name is None:
+                    print(f"Area with ID {area.id} has no name tag")
+                latest_report = area.get_latest_report()
+                if verbose:
+                    print(f"Area {area.name}: has latest report: {latest_report is not None}")
+                if latest_report:
+                    record = build_record(area, latest_report)
+                    for sink in sinks:
+                        sink.write(area, record)
+        finally:
+            for sink in sinks:
+                sink.close()
+
+
+def write_score_comparison(path, rows, group_names, strategy_names):
+    # One row per scored area, each strategy's score and in-group rank side by side
+    fieldnames = ["id", "name", "group"]
+    for name in strategy_names:
+        fieldnames += [f"score ({name})", f"rank ({name})"]
+    with open(path, mode="w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, group=group_names[row["group"]]))
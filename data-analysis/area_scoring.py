@@ -0,0 +1,276 @@
+#Two-pass scoring engine for area-stats-generator.py.
+#The first pass walks the areas once and collects the inputs of every area with a latest report into NumPy arrays.
+#The second pass computes densities, verification ages, normalisations and scores as array operations.
+#Scores come from named strategies in SCORING_STRATEGIES, which can all be evaluated in one run to compare them.
+
+import numpy as np
+from epoch_days import today_epoch_day
+
+# Adjust these weight values as needed
+WEIGHT_WEIGHTED_TOTAL_MERCHANTS = 0.7
+WEIGHT_AREA_SIZE = 0.3
+
+# verification-age strategy (formerly old_algo.py), the sum of the weights should be 1
+WEIGHT_TOTAL_MERCHANTS = 0.2
+WEIGHT_WEIGHTED_AVERAGE_VERIFICATION_AGE = 0.8
+# Score given to areas without a weighted average verification age
+UNVERIFIED_AREA_SCORE = 0.1
+
+# log-merchants strategy (formerly new-algo.py)
+LOG_MERCHANTS_OFFSET = 0.5
+
+# Assumed age of outdated elements, which do not have an average verification date.
+# This should be modified in time to use the last date a bitcoin tag was added to an element should a verification date not be present.
+# This will get more inaccurate over time from Nov 2023, which is 12-months after the verification tags started being added
+AVERAGE_OUTDATED_ELEMENT_AGE = 1 * 365
+
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+
+def collect_metrics(area_groups):
+    # First pass: one row per area that has a latest report, groups laid out back to back
+    scored_areas = []
+    group_bounds = []
+    columns = {
+        "total_elements": [],
+        "total_elements_atms": [],
+        "up_to_date_percent": [],
+        "up_to_date_elements": [],
+        "outdated_elements": [],
+        "verification_day": [],
+        "population": [],
+        "area_km2": [],
+    }
+
+    for areas in area_groups:
+        start = len(scored_areas)
+        for area in areas:
+            latest_report = area.get_latest_report()
+            if not latest_report:
+                continue
+            scored_areas.append(area)
+            columns["total_elements"].append(latest_report.total_elements)
+            columns["total_elements_atms"].append(latest_report.total_elements_atms)
+            columns["up_to_date_percent"].append(_to_float(latest_report.up_to_date_percent))
+            columns["up_to_date_elements"].append(_to_float(latest_report.up_to_date_elements))
+            columns["outdated_elements"].append(_to_float(latest_report.outdated_elements))
+            verification_day = latest_report.average_verification_date
+            columns["verification_day"].append(np.nan if verification_day is None else verification_day)
+            # Population and area of "0" (or missing) mean the density is unknown
+            population = area.population
+            columns["population"].append(float(population) if population and population != '0' else np.nan)
+            columns["area_km2"].append(_to_float(area.area_km2))
+        group_bounds.append((start, len(scored_areas)))
+
+    arrays = {
+        "total_elements": np.array(columns["total_elements"], dtype=np.int64),
+        "total_elements_atms": np.array(columns["total_elements_atms"], dtype=np.int64),
+    }
+    for name in ("up_to_date_percent", "up_to_date_elements", "outdated_elements", "verification_day", "population", "area_km2"):
+        arrays[name] = np.array(columns[name], dtype=np.float64)
+
+    return scored_areas, group_bounds, arrays
+
+
+def _running_group_max(values, valid, group_bounds):
+    # The original loop rebuilt its maxima from the areas scored so far in the group,
+    # so a running maximum per group keeps every score identical to it
+    masked = np.where(valid, values, -np.inf)
+    result = np.empty_like(masked)
+    for start, end in group_bounds:
+        if end > start:
+            result[start:end] = np.maximum.accumulate(masked[start:end])
+    return np.where(np.isneginf(result), 0.0, result)
+
+
+def _group_max(values, valid, group_bounds):
+    # Maximum over the whole group, broadcast back to every row of it
+    masked = np.where(valid, values, -np.inf)
+    result = np.empty_like(masked)
+    for start, end in group_bounds:
+        if end > start:
+            result[start:end] = masked[start:end].max()
+    return np.where(np.isneginf(result), 0.0, result)
+
+
+def score_weighted_merchants(arrays, metrics, group_bounds):
+    # Weighted total merchants and relative size, larger areas get smaller weights
+    area_km2 = arrays["area_km2"]
+    has_area = ~np.isnan(area_km2)
+    weighted_total_merchants = metrics["weighted_total_merchants"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_weighted_total_merchants = _running_group_max(weighted_total_merchants, has_area, group_bounds)
+        max_area_size = _running_group_max(area_km2, has_area, group_bounds)
+        weighted_total_merchants_normalized = np.where(
+            max_weighted_total_merchants != 0, weighted_total_merchants / max_weighted_total_merchants, 0.0)
+        area_size_normalized = np.where(
+            max_area_size != 0, 1 - np.where(has_area, area_km2, 0.0) / max_area_size, 0.0)
+
+    return (
+        (WEIGHT_WEIGHTED_TOTAL_MERCHANTS * weighted_total_merchants_normalized) +
+        (WEIGHT_AREA_SIZE * area_size_normalized)
+    )
+
+
+def score_verification_age(arrays, metrics, group_bounds):
+    # Total merchants and freshness of verification, areas verified more recently score higher
+    total_merchants = metrics["total_merchants"].astype(np.float64)
+    weighted_average_verification_age = metrics["weighted_average_verification_age"]
+    has_age = ~np.isnan(weighted_average_verification_age)
+
+    max_total_merchants = _group_max(total_merchants, np.ones_like(has_age), group_bounds)
+    max_weighted_average_verification_age = _group_max(weighted_average_verification_age, has_age, group_bounds)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized_total_merchants = np.where(max_total_merchants != 0, total_merchants / max_total_merchants, 0.0)
+        normalized_weighted_average_verification_age = np.where(
+            has_age & (max_weighted_average_verification_age != 0),
+            weighted_average_verification_age / max_weighted_average_verification_age, 0.0)
+
+    score = (
+        (WEIGHT_TOTAL_MERCHANTS * normalized_total_merchants) +
+        (WEIGHT_WEIGHTED_AVERAGE_VERIFICATION_AGE * (1 - normalized_weighted_average_verification_age))
+    )
+    return np.where(has_age, score, UNVERIFIED_AREA_SCORE)
+
+
+def score_log_merchants(arrays, metrics, group_bounds):
+    # Log-scaled merchants and population, times the squared share of up-to-date elements
+    total_merchants = metrics["total_merchants"].astype(np.float64)
+    population = arrays["population"]
+    up_to_date_elements = arrays["up_to_date_elements"]
+    has_merchants = total_merchants > 0
+    has_population = population > 0
+    has_up_to_date = ~np.isnan(up_to_date_elements)
+
+    max_total_merchants = _group_max(total_merchants, has_merchants, group_bounds)
+    max_population = _group_max(population, has_population, group_bounds)
+    max_up_to_date_elements = _group_max(up_to_date_elements, has_up_to_date, group_bounds)
+
+    # log(max) is 0 when the maximum is 1, which would divide by zero like a zero maximum does
+    valid = (
+        has_merchants & (max_total_merchants > 1) &
+        has_population & (max_population > 1) &
+        has_up_to_date & (max_up_to_date_elements != 0)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = (
+            (LOG_MERCHANTS_OFFSET + (np.log(total_merchants) / np.log(max_total_merchants))) /
+            (LOG_MERCHANTS_OFFSET + 1)
+        ) * (
+            (np.log(population) / np.log(max_population)) *
+            ((up_to_date_elements / max_up_to_date_elements) ** 2)
+        )
+    return np.where(valid, score, 0.0)
+
+
+SCORING_STRATEGIES = {
+    "weighted-merchants": score_weighted_merchants,
+    "verification-age": score_verification_age,
+    "log-merchants": score_log_merchants,
+}
+DEFAULT_STRATEGY = "weighted-merchants"
+
+
+def compute_metrics(arrays, group_bounds, today=None, strategy=DEFAULT_STRATEGY):
+    # Second pass: every metric as an array operation
+    total_elements = arrays["total_elements"]
+    area_km2 = arrays["area_km2"]
+    has_area = ~np.isnan(area_km2)
+
+    # Total *merchants*, excluding ATMs
+    total_merchants = total_elements - arrays["total_elements_atms"]
+    weighted_total_merchants = total_merchants * (arrays["up_to_date_percent"] / 100)
+
+    # Verification dates are whole epoch days, so their age in days is a subtraction
+    average_verification_age = today_epoch_day(today) - arrays["verification_day"]
+
+    # Weighted average verification age assuming all outdated elements do not have an average verification date
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted_average_verification_age = (
+            (arrays["up_to_date_elements"] * average_verification_age) +
+            (arrays["outdated_elements"] * AVERAGE_OUTDATED_ELEMENT_AGE)
+        ) / total_elements
+        weighted_average_verification_age[total_elements <= 0] = np.nan
+
+        merchants_per_capita = total_merchants / arrays["population"]
+        merchants_per_km2 = np.where(has_area & (area_km2 != 0), total_merchants / area_km2, np.nan)
+
+    metrics = {
+        "total_merchants": total_merchants,
+        "weighted_total_merchants": weighted_total_merchants,
+        "average_verification_age": average_verification_age,
+        "weighted_average_verification_age": weighted_average_verification_age,
+        "merchants_per_capita": merchants_per_capita,
+        "merchants_per_km2": merchants_per_km2,
+    }
+    metrics["score"] = SCORING_STRATEGIES[strategy](arrays, metrics, group_bounds)
+    return metrics
+
+
+def rank_within_groups(scores, group_bounds):
+    # 1 is the highest score in the group, ties keep the order the areas came in
+    ranks = np.empty(len(scores), dtype=np.int64)
+    for start, end in group_bounds:
+        order = np.argsort(-scores[start:end], kind="stable")
+        ranks[start + order] = np.arange(1, end - start + 1)
+    return ranks
+
+
+def _to_python(values, as_int=False):
+    # NaN marks a metric that could not be calculated, which the CSV writer expects as None
+    return [None if np.isnan(value) else (int(value) if as_int else value) for value in values.tolist()]
+
+
+def compare_strategies(arrays, metrics, group_bounds):
+    # Every strategy's score and in-group rank over the same metrics
+    comparison = {}
+    for name, strategy in SCORING_STRATEGIES.items():
+        scores = strategy(arrays, metrics, group_bounds)
+        comparison[name] = (scores.tolist(), rank_within_groups(scores, group_bounds).tolist())
+    return comparison
+
+
+def _score_and_apply(area_groups, today, strategy):
+    scored_areas, group_bounds, arrays = collect_metrics(area_groups)
+    metrics = compute_metrics(arrays, group_bounds, today, strategy)
+
+    columns = {
+        "total_merchants": metrics["total_merchants"].tolist(),
+        "weighted_total_merchants": _to_python(metrics["weighted_total_merchants"]),
+        "average_verification_age": _to_python(metrics["average_verification_age"], as_int=True),
+        "weighted_average_verification_age": _to_python(metrics["weighted_average_verification_age"]),
+        "merchants_per_capita": _to_python(metrics["merchants_per_capita"]),
+        "merchants_per_km2": _to_python(metrics["merchants_per_km2"]),
+        "score": metrics["score"].tolist(),
+    }
+    for name, values in columns.items():
+        for area, value in zip(scored_areas, values):
+            setattr(area, name, value)
+
+    return scored_areas, group_bounds, arrays, metrics
+
+
+def score_area_groups(*area_groups, today=None, strategy=DEFAULT_STRATEGY):
+    scored_areas, _, _, _ = _score_and_apply(area_groups, today, strategy)
+    return scored_areas
+
+
+def compare_area_groups(*area_groups, today=None, strategy=DEFAULT_STRATEGY):
+    # Scores the areas like score_area_groups, and returns one comparison row per scored area
+    scored_areas, group_bounds, arrays, metrics = _score_and_apply(area_groups, today, strategy)
+    comparison = compare_strategies(arrays, metrics, group_bounds)
+
+    rows = []
+    for group_index, (start, end) in enumerate(group_bounds):
+        for row in range(start, end):
+            area = scored_areas[row]
+            record = {"id": area.id, "name": area.name, "group": group_index}
+            for name, (scores, ranks) in comparison.items():
+                record[f"score ({name})"] = scores[row]
+                record[f"rank ({name})"] = ranks[row]
+            rows.append(record)
+    return rows
@@ -0,0 +1,41 @@
+#Shared date parsing for area-stats-generator.py and its helpers.
+#Dates are held as epoch days (days since 1970-01-01), so comparing dates and computing ages are integer operations.
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+@lru_cache(maxsize=None)
+def _epoch_day_from_prefix(date_prefix):
+    return date.fromisoformat(date_prefix).toordinal() - EPOCH_ORDINAL
+
+
+def parse_epoch_day(date_string):
+    # API timestamps can carry nanosecond fractions that datetime cannot parse, but only the day is needed.
+    # Thousands of reports share a day, so parses are memoised on the YYYY-MM-DD prefix
+    if not date_string:
+        return None
+    try:
+        return _epoch_day_from_prefix(date_string[:10])
+    except ValueError:
+        print(f"Failed to parse date {date_string}")
+        return None
+
+
+def today_epoch_day(today=None):
+    return (today or date.today()).toordinal() - EPOCH_ORDINAL
+
+
+def epoch_day_to_date(epoch_day):
+    if epoch_day is None:
+        return None
+    return EPOCH + timedelta(days=int(epoch_day))
+
+
+def epoch_day_to_iso(epoch_day):
+    if epoch_day is None:
+        return None
+    return epoch_day_to_date(epoch_day).isoformat()
@@ -9,11 +9,17 @@
 ### 2) Add charting via matplotlib
 ### 3) Add in culmative count to CSV
 
-import requests
 import csv
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+
+#Overpass sends nothing until the query has finished, and its default query timeout is 180s.
+#The read timeout leaves room for that plus time queued on a busy server.
+OVERPASS_TIMEOUT = (10, 300)
 
 #Enter area name. This will be used to get the most likley area ID from Nominatim (Overpass does this)
 area = "CZ"
@@ -37,7 +43,7 @@ headers = {
 }
 
 # Send the query to the Overpass API to get a list of node IDs
-response = requests.post("https://overpass-api.de/api/interpreter", data=overpass_query)
+response = client.post("https://overpass-api.de/api/interpreter", data=overpass_query, timeout=OVERPASS_TIMEOUT)
 
 # Check if the request was successful
 if response.status_code == 200:
@@ -59,7 +65,7 @@ if response.status_code == 200:
         history_url = f"https://www.openstreetmap.org/api/0.6/node/{node_id}/history"
         
         # Send a GET request to retrieve the changeset history
-        history_response = requests.get(history_url, headers=headers)
+        history_response = client.get(history_url, headers=headers)
     
         
         # Check if the history request was successful
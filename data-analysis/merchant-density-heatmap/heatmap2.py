@@ -1,4 +1,3 @@
-import requests
 import geopandas as gpd
 import os
 import numpy as np
@@ -8,6 +7,9 @@ import json
 from shapely.geometry import box, shape
 import folium
 from folium.plugins import HeatMap
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from btcmap import client
 
 # Set the working directory to the script's directory
 script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -15,7 +17,7 @@ os.chdir(script_directory)
 
 def fetch_merchant_data() -> None:
     url = "https://api.btcmap.org/v2/elements?updated_since=2022-10-11T00:00:00.000Z&limit=100000"
-    response = requests.get(url)
+    response = client.get(url)
 
     if response.status_code == 200:
         try:
@@ -38,7 +40,7 @@ def fetch_merchant_data() -> None:
 
 def fetch_area_data():
     url_areas = "https://api.btcmap.org/v3/areas?updated_since=2022-10-11T00:00:00.000Z&limit=1000"
-    response_areas = requests.get(url_areas)
+    response_areas = client.get(url_areas)
     
     if response_areas.status_code == 200:
         try:
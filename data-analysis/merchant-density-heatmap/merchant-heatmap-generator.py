@@ -1,17 +1,20 @@
-import requests
 import geopandas as gpd
 import pathlib
 import numpy as np
 import h3pandas
 import json  # Import the json module
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from btcmap import client
 
 # Define script directory
 script_directory = pathlib.Path(__file__).parent.absolute()
 
 # Step 1: Get Latest Merchants from btcmap.org/elements
 url = "https://api.btcmap.org/elements"  # Updated URL
-response = requests.get(url)
+response = client.get(url)
 
 # Check if the response status code indicates success
 if response.status_code != 200:
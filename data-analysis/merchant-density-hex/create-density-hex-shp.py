@@ -1,9 +1,11 @@
-import requests
 import json
 import geopandas as gpd
 from shapely.geometry import Point, Polygon, mapping
 import h3
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from btcmap import client
 
 # Set the working directory to the script's directory
 script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -11,7 +13,7 @@ os.chdir(script_directory)
 
 # Step 1: Get Latest Merchants from your URL
 url = "https://api.btcmap.org/elements"
-response = requests.get(url)
+response = client.get(url)
 
 # Check if the response status code indicates success
 if response.status_code == 200:
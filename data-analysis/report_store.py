@@ -0,0 +1,165 @@
+#Columnar on-disk archive of BTC Map reports for area-stats-generator.py.
+#Every report field is stored as its own .npy column and loaded memory-mapped, next to a precomputed
+#index of the latest report per area. Reading the latest reports then only touches one row per area.
+
+import os
+import json
+from array import array
+import numpy as np
+from epoch_days import parse_epoch_day, epoch_day_to_iso
+
+STORE_META_FILE = "meta.json"
+STORE_VERSION = 2
+
+MISSING_DAY = np.iinfo(np.int32).min
+
+# Report tags kept in the store, all nullable so they are held as float64 with NaN for missing values.
+# Next to each one an int8 column records whether the value was an int in reports.json
+NUMERIC_TAGS = [
+    "grade",
+    "legacy_elements",
+    "outdated_elements",
+    "total_elements",
+    "total_elements_lightning",
+    "total_elements_lightning_contactless",
+    "total_elements_onchain",
+    "total_atms",
+    "up_to_date_elements",
+    "up_to_date_percent",
+]
+
+
+def _to_epoch_day(date_string):
+    epoch_day = parse_epoch_day(date_string)
+    return MISSING_DAY if epoch_day is None else epoch_day
+
+
+def _from_epoch_day(epoch_day):
+    if epoch_day == MISSING_DAY:
+        return None
+    return epoch_day_to_iso(epoch_day)
+
+
+def _int_column(tag):
+    return f"{tag}_is_int"
+
+
+def _from_float(value, is_int):
+    # Values come back with the type they had, so the CSVs look the same as when read from reports.json
+    if np.isnan(value):
+        return None
+    return int(value) if is_int else float(value)
+
+
+def _source_signature(source_file):
+    stat = os.stat(source_file)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def is_store_current(store_dir, source_file):
+    meta_path = os.path.join(store_dir, STORE_META_FILE)
+    if not os.path.exists(meta_path) or not os.path.exists(source_file):
+        return False
+    with open(meta_path, 'r') as file:
+        meta = json.load(file)
+    return meta.get("version") == STORE_VERSION and meta.get("source") == _source_signature(source_file)
+
+
+def build_latest_index(area_ids, dates):
+    # Sort by area, then date, then descending row so the last row of each area run is its latest report.
+    # Ties on date go to the earliest row, matching max() over the reports in file order
+    rows = np.arange(len(area_ids))
+    order = np.lexsort((-rows, dates, area_ids))
+    sorted_area_ids = area_ids[order]
+    is_last = np.ones(len(order), dtype=bool)
+    is_last[:-1] = sorted_area_ids[1:] != sorted_area_ids[:-1]
+    return sorted_area_ids[is_last], order[is_last]
+
+
+def write_report_store(reports, store_dir, source_file=None):
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Drop the meta file first so a half-written store is never treated as current
+    meta_path = os.path.join(store_dir, STORE_META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    # One pass into typed buffers, so reports can be a generator and no per-report objects are kept
+    buffers = {
+        "id": array('q'),
+        "area_id": array('q'),
+        "date": array('i'),
+        "avg_verification_date": array('i'),
+    }
+    for tag in NUMERIC_TAGS:
+        buffers[tag] = array('d')
+        buffers[_int_column(tag)] = array('b')
+
+    for report in reports:
+        tags = report['tags']
+        buffers["id"].append(report['id'])
+        buffers["area_id"].append(report.get('area_id') or 0)
+        buffers["date"].append(_to_epoch_day(report['date']))
+        buffers["avg_verification_date"].append(_to_epoch_day(tags.get('avg_verification_date')))
+        for tag in NUMERIC_TAGS:
+            value = tags.get(tag)
+            buffers[tag].append(np.nan if value is None else value)
+            buffers[_int_column(tag)].append(isinstance(value, int))
+
+    columns = {name: np.frombuffer(buffer, dtype=buffer.typecode) for name, buffer in buffers.items()}
+
+    # Reports without an area are never joined, so they stay out of the index
+    has_area = np.flatnonzero(columns["area_id"] != 0)
+    latest_area_ids, latest_positions = build_latest_index(columns["area_id"][has_area], columns["date"][has_area])
+    latest_rows = has_area[latest_positions]
+    columns["latest_area_id"] = latest_area_ids
+    columns["latest_row"] = latest_rows
+
+    for name, values in columns.items():
+        np.save(os.path.join(store_dir, f"{name}.npy"), values)
+
+    meta = {"version": STORE_VERSION, "reports": len(columns["id"])}
+    if source_file:
+        meta["source"] = _source_signature(source_file)
+    with open(meta_path, 'w') as file:
+        json.dump(meta, file)
+
+
+class ReportStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self._columns = {}
+        self._latest_area_ids = self._column("latest_area_id")
+        self._latest_rows = self._column("latest_row")
+
+    def _column(self, name):
+        # Columns are memory-mapped, so only the pages holding rows that are read get loaded
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.store_dir, f"{name}.npy"), mmap_mode='r')
+        return self._columns[name]
+
+    def __len__(self):
+        return len(self._column("id"))
+
+    def latest_row(self, area_id):
+        position = np.searchsorted(self._latest_area_ids, area_id)
+        if position < len(self._latest_area_ids) and self._latest_area_ids[position] == area_id:
+            return int(self._latest_rows[position])
+        return None
+
+    def report_data(self, row):
+        # Rebuild the reports.json shape for a single row, so it can be handed to Report
+        tags = {tag: _from_float(self._column(tag)[row], self._column(_int_column(tag))[row]) for tag in NUMERIC_TAGS}
+        tags["avg_verification_date"] = _from_epoch_day(self._column("avg_verification_date")[row])
+        return {
+            "id": int(self._column("id")[row]),
+            "area_id": int(self._column("area_id")[row]),
+            "date": _from_epoch_day(self._column("date")[row]),
+            "tags": tags,
+        }
+
+    def latest_report_data(self, area_id):
+        row = self.latest_row(area_id)
+        if row is None:
+            return None
+        return self.report_data(row)
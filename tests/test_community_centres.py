@@ -0,0 +1,77 @@
+#Checks that one bad area in btcmap.db is skipped by community-centres.py instead of aborting the run.
+#Run from the repository root with: python -m unittest discover tests
+
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_PATH = os.path.join(REPO_DIRECTORY, "utility-scripts", "community-centres.py")
+
+
+def load_community_centres():
+    # The script has a hyphenated name, and the worker processes unpickle its functions by module name
+    spec = importlib.util.spec_from_file_location("community_centres", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["community_centres"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+SQUARE = {"type": "Polygon", "coordinates": [[[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]]]}
+
+
+class BadAreaRowsTest(unittest.TestCase):
+    def setUp(self):
+        self.community_centres = load_community_centres()
+        descriptor, self.database = tempfile.mkstemp(suffix=".db")
+        os.close(descriptor)
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE area (id INTEGER PRIMARY KEY, tags TEXT, deleted_at TEXT)")
+        conn.executemany("INSERT INTO area VALUES (?, ?, NULL)", [
+            (1, json.dumps({"name": "Square", "geo_json": SQUARE, "lat": 1, "lon": 1})),
+            (2, json.dumps({"name": "String", "geo_json": "not an object"})),
+            (3, '{"name": "Malformed", "geo_json": {"type":'),
+            (4, json.dumps({"name": "After the bad rows", "geo_json": SQUARE})),
+        ])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        os.remove(self.database)
+
+    def run_centres(self, incremental=False):
+        conn = sqlite3.connect(self.database)
+        try:
+            self.community_centres.create_state_table(conn)
+            updates, hashes, recomputed, skipped = self.community_centres.compute_updates(
+                conn, workers=1, chunk_size=2, incremental=incremental)
+            self.community_centres.write_updates(conn, updates, hashes)
+            tags = {area_id: tags for area_id, tags in conn.execute("SELECT id, tags FROM area")}
+        finally:
+            conn.close()
+        return tags, recomputed, skipped
+
+    def test_bad_rows_are_skipped(self):
+        tags, recomputed, _ = self.run_centres()
+        self.assertEqual(recomputed, 4)
+        for area_id in (1, 4):
+            area_tags = json.loads(tags[area_id])
+            self.assertEqual(area_tags["centroid"], {"lat": 1.0, "lon": 1.0})
+            self.assertEqual(area_tags["geo_json"]["bbox"], [0.0, 0.0, 2.0, 2.0])
+            self.assertNotIn("lat", area_tags)
+        self.assertEqual(json.loads(tags[2]), {"name": "String", "geo_json": "not an object"})
+        self.assertEqual(tags[3], '{"name": "Malformed", "geo_json": {"type":')
+
+    def test_incremental_run_retries_only_the_malformed_row(self):
+        self.run_centres()
+        _, recomputed, skipped = self.run_centres(incremental=True)
+        self.assertEqual((recomputed, skipped), (1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
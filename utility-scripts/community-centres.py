@@ -1,99 +1,259 @@
-import sqlite3
+#Sets the centroid tag and the geo_json bbox of every area in btcmap.db, and drops the old lat/lon tags.
+#Areas are read in id-ordered chunks, each in its own short read, and their geometry is worked out in a pool
+#of processes. The tag changes of an area are merged into one JSON edit and all of them are written at the
+#end with executemany in a single transaction, so the write lock is held for seconds rather than minutes.
+#With --incremental, areas whose geo_json hash and updated_at match the last run are skipped. The hashes
+#live in the area_centre_state side table, which every run keeps up to date.
+
+import argparse
+import hashlib
 import json
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from shapely.geometry import shape
 from shapely.ops import unary_union
 
-# Connect to SQLite database
-conn = sqlite3.connect('btcmap.db')
-cur = conn.cursor()
+DEFAULT_DATABASE = 'btcmap.db'
+CHUNK_SIZE = 500
 
-# Select all areas that are not deleted
-cur.execute("SELECT id, tags FROM area WHERE deleted_at IS NULL")
-areas = cur.fetchall()
+STATE_TABLE = 'area_centre_state'
+# Stands in for the geo_json type when the tags themselves are not valid JSON
+MALFORMED_TAGS = 'malformed'
 
-for area_id, tags_str in areas:
-    try:
-        tags = json.loads(tags_str)
+# The three edits the script used to make one statement at a time, nested into one
+UPDATE_AREA_SQL = """
+    UPDATE area
+    SET tags = json_set(
+        json_remove(tags, '$.lat', '$.lon'),
+        '$.centroid', json(?),
+        '$.geo_json.bbox', json(?)
+    )
+    WHERE id = ?
+"""
 
-        # Check if geo_json exists in tags
-        if 'geo_json' not in tags:
-            print(f"Area ID {area_id} does not have geo_json data, skipping...")
-            continue
+# The hash is taken after the area was written, along with the updated_at the write may have bumped
+RECORD_STATE_SQL = f"""
+    INSERT OR REPLACE INTO {STATE_TABLE} (area_id, geometry_hash, updated_at)
+    SELECT id, ?, {{updated_at}} FROM area WHERE id = ?
+"""
 
-        geojson_data = tags['geo_json']
-        geometries = []
-
-        # If the geo_json is a GeoJSON FeatureCollection
-        if isinstance(geojson_data, dict) and 'type' in geojson_data:
-            if geojson_data['type'] == 'FeatureCollection' and 'features' in geojson_data:
-                # Handle FeatureCollection
-                for feature in geojson_data['features']:
-                    try:
-                        geom = shape(feature['geometry'])
-                        geometries.append(geom)
-                    except (ValueError, IndexError, KeyError) as e:
-                        print(f"Error processing feature in area {area_id}: {e}")
-                        continue
-            else:
-                # Handle single geometry
+
+def area_geometries(area_id, geojson_data, messages):
+    geometries = []
+
+    # If the geo_json is a GeoJSON FeatureCollection
+    if isinstance(geojson_data, dict) and 'type' in geojson_data:
+        if geojson_data['type'] == 'FeatureCollection' and 'features' in geojson_data:
+            # Handle FeatureCollection
+            for feature in geojson_data['features']:
                 try:
-                    # Check if MultiPolygon has valid structure
-                    if geojson_data.get('type') == 'MultiPolygon':
-                        coordinates = geojson_data.get('coordinates', [])
-                        # Validate that all polygon arrays have content and proper structure
-                        for polygon in coordinates:
-                            if not polygon or not isinstance(polygon, list):
-                                raise ValueError("Invalid MultiPolygon structure: empty or malformed polygon")
-                    
-                    geom = shape(geojson_data)
+                    geom = shape(feature['geometry'])
                     geometries.append(geom)
                 except (ValueError, IndexError, KeyError) as e:
-                    print(f"Invalid GeoJSON in area {area_id}: {e}")
-                    print(f"GeoJSON type: {geojson_data.get('type', 'unknown')}")
+                    messages.append(f"Error processing feature in area {area_id}: {e}")
                     continue
+        else:
+            # Handle single geometry
+            try:
+                # Check if MultiPolygon has valid structure
+                if geojson_data.get('type') == 'MultiPolygon':
+                    coordinates = geojson_data.get('coordinates', [])
+                    # Validate that all polygon arrays have content and proper structure
+                    for polygon in coordinates:
+                        if not polygon or not isinstance(polygon, list):
+                            raise ValueError("Invalid MultiPolygon structure: empty or malformed polygon")
+
+                geom = shape(geojson_data)
+                geometries.append(geom)
+            except (ValueError, IndexError, KeyError) as e:
+                messages.append(f"Invalid GeoJSON in area {area_id}: {e}")
+                messages.append(f"GeoJSON type: {geojson_data.get('type', 'unknown')}")
+                return None
+
+    return geometries
+
 
-        if not geometries:
-            print(f"No valid geometries found for area {area_id}, skipping...")
+def process_area(area_id, geo_json_text, geo_json_type, messages):
+    """(centroid JSON, bbox JSON, area id) for one area, None when it has no usable geometry.
+
+    geo_json_type is the JSON type of the geo_json tag, None when there is no such tag and
+    MALFORMED_TAGS when the tags are not valid JSON. Only an object comes with its text.
+    """
+    if geo_json_type == MALFORMED_TAGS:
+        raise ValueError("tags are not valid JSON")
+    # Check if geo_json exists in tags
+    if geo_json_type is None:
+        messages.append(f"Area ID {area_id} does not have geo_json data, skipping...")
+        return None
+
+    # Anything but an object (a string, null, a list) has no geometries to read
+    geojson_data = json.loads(geo_json_text) if geo_json_type == 'object' else None
+    geometries = area_geometries(area_id, geojson_data, messages)
+    if geometries is None:
+        return None
+    if not geometries:
+        messages.append(f"No valid geometries found for area {area_id}, skipping...")
+        return None
+
+    # Create unary union of all geometries (poly & multi-poly)
+    unified = unary_union(geometries)
+
+    # Calculate the centroid
+    centroid = unified.centroid
+    lat, lon = centroid.y, centroid.x
+
+    # Create a bbox array in GeoJSON format [west, south, east, north]
+    minx, miny, maxx, maxy = unified.bounds
+    bbox_array = [minx, miny, maxx, maxy]
+
+    return (json.dumps({'lat': lat, 'lon': lon}), json.dumps(bbox_array), area_id)
+
+
+def process_chunk(rows):
+    """Runs in a worker process. Returns the updates, the ids that failed and the messages to print for (id, geo_json, type) rows."""
+    updates = []
+    failed = []
+    messages = []
+    for area_id, geo_json_text, geo_json_type in rows:
+        try:
+            update = process_area(area_id, geo_json_text, geo_json_type, messages)
+        except Exception as e:
+            messages.append(f"Error processing area {area_id}: {e}")
+            failed.append(area_id)
             continue
+        if update:
+            updates.append(update)
+            messages.append(f"Successfully processed area {area_id}")
+    return updates, failed, messages
+
+
+def has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def create_state_table(conn):
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                area_id INTEGER PRIMARY KEY,
+                geometry_hash TEXT NOT NULL,
+                updated_at TEXT
+            )
+        """)
+
+
+def iter_area_chunks(conn, updated_at_column, chunk_size=CHUNK_SIZE):
+    """Chunks of (id, geo_json, geo_json type, updated_at, stored hash, stored updated_at) rows.
+
+    geo_json is only read when it is an object, without the bbox this script adds. The JSON functions
+    raise on malformed JSON, so they are guarded and a bad row is reported by process_area instead of
+    aborting the query.
+    """
+    query = f"""
+        SELECT area.id,
+               CASE WHEN json_valid(area.tags) AND json_type(area.tags, '$.geo_json') = 'object'
+                    THEN json_remove(json_extract(area.tags, '$.geo_json'), '$.bbox') END,
+               CASE WHEN json_valid(area.tags) THEN json_type(area.tags, '$.geo_json') ELSE '{MALFORMED_TAGS}' END,
+               {updated_at_column}, state.geometry_hash, state.updated_at
+        FROM area LEFT JOIN {STATE_TABLE} AS state ON state.area_id = area.id
+        WHERE area.deleted_at IS NULL AND area.id > ?
+        ORDER BY area.id
+        LIMIT ?
+    """
+    # Keyset paging, so no read transaction stays open while the chunks are processed
+    last_id = -1
+    while True:
+        rows = conn.execute(query, (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def geo_json_hash(geo_json_text):
+    # SQLite hands geo_json back minified, so the text itself is hashed without parsing it
+    return hashlib.sha256((geo_json_text or "").encode("utf-8")).hexdigest()
+
+
+def compute_updates(conn, workers, chunk_size=CHUNK_SIZE, incremental=False):
+    """(updates, {area id: geo_json hash} of the areas to record, recomputed count, skipped count).
+
+    At most two chunks per worker are read ahead of the pool.
+    """
+    updates = []
+    hashes = {}
+    recomputed = 0
+    skipped = 0
+    updated_at_column = "area.updated_at" if has_column(conn, "area", "updated_at") else "NULL"
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for rows in iter_area_chunks(conn, updated_at_column, chunk_size):
+            changed = []
+            for area_id, geo_json_text, geo_json_type, updated_at, stored_hash, stored_updated_at in rows:
+                digest = geo_json_hash(geo_json_text)
+                if incremental and digest == stored_hash and updated_at == stored_updated_at:
+                    skipped += 1
+                    continue
+                hashes[area_id] = digest
+                changed.append((area_id, geo_json_text, geo_json_type))
+            if not changed:
+                continue
+            recomputed += len(changed)
+            pending.append(executor.submit(process_chunk, changed))
+            if len(pending) >= 2 * workers:
+                updates.extend(collect_chunk(pending.popleft(), hashes))
+        while pending:
+            updates.extend(collect_chunk(pending.popleft(), hashes))
+    return updates, hashes, recomputed, skipped
+
+
+def collect_chunk(future, hashes):
+    chunk_updates, failed, messages = future.result()
+    for message in messages:
+        print(message)
+    # Areas that raised are left unrecorded, so the next run retries them
+    for area_id in failed:
+        del hashes[area_id]
+    return chunk_updates
+
+
+def write_updates(conn, updates, hashes):
+    updated_at_column = "updated_at" if has_column(conn, "area", "updated_at") else "NULL"
+    # One transaction for every area, committed when the block ends
+    with conn:
+        conn.executemany(UPDATE_AREA_SQL, updates)
+        conn.executemany(RECORD_STATE_SQL.format(updated_at=updated_at_column),
+                         [(digest, area_id) for area_id, digest in hashes.items()])
+        # Forget deleted areas, so one that comes back is recomputed
+        conn.execute(f"DELETE FROM {STATE_TABLE} WHERE area_id NOT IN (SELECT id FROM area WHERE deleted_at IS NULL)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set the centroid and bbox of every area in btcmap.db")
+    parser.add_argument("--db", default=DEFAULT_DATABASE, help=f"SQLite database (default: {DEFAULT_DATABASE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes computing geometry (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"Areas per chunk handed to a worker (default: {CHUNK_SIZE})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip areas whose geo_json and updated_at are unchanged since the last run")
+    args = parser.parse_args()
+
+    # Connect to SQLite database
+    conn = sqlite3.connect(args.db)
+    try:
+        create_state_table(conn)
+        updates, hashes, recomputed, skipped = compute_updates(conn, max(1, args.workers), max(1, args.chunk_size), args.incremental)
+        write_updates(conn, updates, hashes)
+    finally:
+        conn.close()
+
+    print(f"Recomputed {recomputed} areas ({len(updates)} updated), skipped {skipped} unchanged areas")
+    print("Area centroids and bounding boxes updated successfully!")
+
 
-        # Create unary union of all geometries (poly & multi-poly)
-        unified = unary_union(geometries)
-
-        # Calculate the centroid
-        centroid = unified.centroid
-        lat, lon = centroid.y, centroid.x
-
-        # Calculate the bounding box coordinates
-        minx, miny, maxx, maxy = unified.bounds
-        
-        # Create a bbox array in GeoJSON format [west, south, east, north]
-        bbox_array = [minx, miny, maxx, maxy]
-        
-        # First update the centroid
-        cur.execute("UPDATE area SET tags = json_set(tags, '$.centroid', json(?)) WHERE id = ?",
-                   (json.dumps({'lat': lat, 'lon': lon}), area_id))
-
-        # Remove the existing lat and lon tags
-        cur.execute("UPDATE area SET tags = json_remove(tags, '$.lat', '$.lon') WHERE id = ?", (area_id,))
-        
-        # Then add the bbox to the geo_json structure according to GeoJSON spec
-        cur.execute("""
-            UPDATE area 
-            SET tags = json_set(
-                tags, 
-                '$.geo_json.bbox', 
-                json(?)
-            ) 
-            WHERE id = ?
-        """, (json.dumps(bbox_array), area_id))
-
-        print(f"Successfully processed area {area_id}")
-
-    except Exception as e:
-        print(f"Error processing area {area_id}: {e}")
-        continue
-
-# Commit changes and close the connection
-conn.commit()
-conn.close()
-print("Area centroids and bounding boxes updated successfully!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
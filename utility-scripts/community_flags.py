@@ -0,0 +1,250 @@
+#Country flags for BTC Map communities, shared by rpc-reports.py and fetch-communities.py.
+#Countries are resolved from the area-weighted centroid of the area's GeoJSON and cached per area id in the user
+#cache directory (btcmap/paths.py), keyed on a hash of the geometry so an entry is only recomputed when the polygon changes.
+#Uncached areas are resolved in two phases: every centroid is collected first, then all of them
+#go through one batched lookup, either point-in-polygon against the bundled country borders
+#(country_resolver.py) or nearest-place reverse geocoding.
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+from btcmap.geometry import centroid, centroids
+from btcmap.listing import iter_updated_since
+from btcmap.paths import CACHE_DIRECTORY
+
+API_BASE = "https://api.btcmap.org/v3/areas"
+FLAG_CACHE_FILE = os.path.join(CACHE_DIRECTORY, "community_flags.json")
+# Bumped when cached countries would come out differently, version 2 uses area-weighted centroids
+FLAG_CACHE_VERSION = 2
+# How often the cache asks the API which areas changed, runs in between make no network calls for cached areas
+FLAG_CACHE_REVALIDATE_SECONDS = 24 * 60 * 60
+FLAG_CACHE_PAGE_LIMIT = 5000
+# Below this many points reverse_geocoder's single-process KD-tree beats starting its worker pool
+REVERSE_GEOCODER_MULTIPROCESS_MIN = 10000
+COUNTRY_RESOLVERS = ["borders", "geocoder"]
+DEFAULT_COUNTRY_RESOLVER = "borders"
+
+
+def get_country_from_coordinates(lat, lon):
+    """Get country code from coordinates using reverse geocoding."""
+    import reverse_geocoder as rg
+    try:
+        result = rg.search((lat, lon))
+        if result and len(result) > 0:
+            return result[0].get('cc')
+    except Exception as e:
+        print(f"Warning: Reverse geocoding failed: {e}", file=sys.stderr)
+    return None
+
+
+def get_countries_from_coordinates(coordinates):
+    """Country codes for a list of (lat, lon), in one batched reverse geocoding query."""
+    if not coordinates:
+        return []
+    import reverse_geocoder as rg
+    mode = 2 if len(coordinates) >= REVERSE_GEOCODER_MULTIPROCESS_MIN else 1
+    try:
+        results = rg.search(coordinates, mode=mode, verbose=False)
+        return [result.get('cc') for result in results]
+    except Exception as e:
+        print(f"Warning: Reverse geocoding failed: {e}", file=sys.stderr)
+        return [None] * len(coordinates)
+
+
+border_resolver = None
+
+
+def get_countries_from_borders(coordinates):
+    """Country codes for a list of (lat, lon), by point-in-polygon against the Natural Earth borders."""
+    global border_resolver
+    if not coordinates:
+        return []
+    if border_resolver is None:
+        from country_resolver import CountryResolver
+        border_resolver = CountryResolver()
+    return border_resolver.resolve(coordinates)
+
+
+def country_lookup(resolver):
+    return get_countries_from_borders if resolver == "borders" else get_countries_from_coordinates
+
+
+def country_code_to_flag_emoji(country_code):
+    """Convert 2-letter country code to flag emoji."""
+    if not country_code or len(country_code) != 2:
+        return None
+    return ''.join(chr(ord(c) + 127397) for c in country_code.upper())
+
+
+def geometry_hash(geo_json):
+    """Stable hash of a GeoJSON geometry, independent of key order."""
+    canonical = json.dumps(geo_json, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def geometry_key(area_data):
+    """(area id, geometry hash, centroid) for area data, all the flag lookup needs once the GeoJSON is dropped."""
+    geo_json = area_data.get('tags', {}).get('geo_json')
+    if not geo_json:
+        return (str(area_data.get('id')), None, None)
+    return (str(area_data.get('id')), geometry_hash(geo_json), centroid(geo_json))
+
+
+def geometry_keys(areas):
+    """geometry_key for many areas, with every centroid computed in one vectorized call."""
+    geo_jsons = [area_data.get('tags', {}).get('geo_json') for area_data in areas]
+    area_centroids = centroids([geo_json or None for geo_json in geo_jsons])
+    return [
+        (str(area_data.get('id')), geometry_hash(geo_json), area_centroid) if geo_json else (str(area_data.get('id')), None, None)
+        for area_data, geo_json, area_centroid in zip(areas, geo_jsons, area_centroids)
+    ]
+
+
+def fetch_area(area_id):
+    """Fetch area data from the REST API, None if it cannot be fetched."""
+    try:
+        response = client.get(f"{API_BASE}/{area_id}", timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        return None
+    except requests.RequestException:
+        return None
+
+
+def fetch_areas_updated_since(updated_since):
+    """Every area changed after updated_since, None if the listing cannot be fetched."""
+    try:
+        return list(iter_updated_since(API_BASE, updated_since, FLAG_CACHE_PAGE_LIMIT, timeout=30))
+    except (requests.RequestException, ValueError) as e:
+        print(f"Warning: Could not revalidate the flag cache: {e}", file=sys.stderr)
+        return None
+
+
+class FlagCache:
+    """On-disk map of area id to country code, keyed on the area's geometry hash.
+
+    Entries remember which resolver produced them, so switching resolvers recomputes them.
+    """
+
+    def __init__(self, path=FLAG_CACHE_FILE, resolver=DEFAULT_COUNTRY_RESOLVER):
+        self.path = path
+        self.resolver = resolver
+        self.dirty = False
+        self.synced_at = None
+        self.checked_at = 0
+        self.areas = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    data = json.load(file)
+                if data.get("version", 1) != FLAG_CACHE_VERSION:
+                    data = {}
+                self.synced_at = data.get("synced_at")
+                self.checked_at = data.get("checked_at", 0)
+                self.areas = data.get("areas", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable flag cache {path}: {e}", file=sys.stderr)
+
+    def cached(self, area_id):
+        entry = self.areas.get(area_id)
+        if entry and entry.get("resolver", "geocoder") == self.resolver:
+            return entry
+        return None
+
+    def countries_for_geometries(self, geometry_keys):
+        """Country codes as {area id: code} for (area id, geometry hash, centroid) keys.
+
+        Keys whose geometry hash matches the cache reuse the cached code. The centroids of
+        the rest are collected first and resolved together in one batched lookup.
+        """
+        countries = {}
+        pending = []
+        for area_id, digest, point in geometry_keys:
+            if digest is None:
+                countries[area_id] = None
+                continue
+            entry = self.cached(area_id)
+            if entry and entry["geometry_hash"] == digest:
+                countries[area_id] = entry["country_code"]
+            else:
+                pending.append((area_id, digest, point))
+
+        located = [(area_id, digest, point) for area_id, digest, point in pending if point]
+        country_codes = country_lookup(self.resolver)([point for _, _, point in located])
+        resolved = {area_id: country_code for (area_id, _, _), country_code in zip(located, country_codes)}
+
+        for area_id, digest, _ in pending:
+            country_code = resolved.get(area_id)
+            self.areas[area_id] = {"geometry_hash": digest, "country_code": country_code, "resolver": self.resolver}
+            countries[area_id] = country_code
+        if pending:
+            self.dirty = True
+        return countries
+
+    def countries_for_areas(self, areas):
+        """Country codes for fetched area data as {area id: code}."""
+        return self.countries_for_geometries(geometry_keys(areas))
+
+    def country_for_area(self, area_data):
+        """Country code for fetched area data, reusing the cached one while the geometry is unchanged."""
+        return self.countries_for_areas([area_data])[str(area_data.get('id'))]
+
+    def countries_for_ids(self, area_ids):
+        """Country codes as {area id: code}, fetching only the areas that are not cached."""
+        countries = {}
+        fetched = []
+        for area_id in area_ids:
+            entry = self.cached(str(area_id))
+            if entry:
+                countries[str(area_id)] = entry["country_code"]
+                continue
+            area_data = fetch_area(area_id)
+            if area_data and 'tags' in area_data:
+                fetched.append(area_data)
+            else:
+                countries[str(area_id)] = None
+        countries.update(self.countries_for_areas(fetched))
+        return countries
+
+    def country_for_id(self, area_id):
+        """Country code for an area id, fetching the area only when it is not cached."""
+        return self.countries_for_ids([area_id])[str(area_id)]
+
+    def revalidate(self, force=False):
+        """Recheck cached areas whose geometry may have changed, at most once per FLAG_CACHE_REVALIDATE_SECONDS."""
+        now = time.time()
+        if not force and now - self.checked_at < FLAG_CACHE_REVALIDATE_SECONDS:
+            return
+        if self.synced_at and self.areas:
+            changed = fetch_areas_updated_since(self.synced_at)
+            if changed is None:
+                return
+            cached = [area_data for area_data in changed if str(area_data.get('id')) in self.areas]
+            for area_data in cached:
+                if area_data.get('deleted_at'):
+                    del self.areas[str(area_data.get('id'))]
+            self.countries_for_areas([area_data for area_data in cached if not area_data.get('deleted_at')])
+            if changed:
+                self.synced_at = max(area_data['updated_at'] for area_data in changed)
+        else:
+            self.synced_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.checked_at = now
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {"version": FLAG_CACHE_VERSION, "synced_at": self.synced_at, "checked_at": self.checked_at, "areas": self.areas}
+        temp_path = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,238 @@
+#Point-in-polygon country lookup against the Natural Earth borders in country-data-import/input.
+#Points are first tested against the coarse 110m shapes, shrunk by a margin so only points clearly inside one
+#country are answered there. Points near a border, on the coast, or near a country missing at 110m
+#are refined against the 10m shapes, split into small pieces so each test only touches a few hundred vertices.
+#Building the shapes takes a few seconds, so they are cached as WKB in the user cache directory (btcmap/paths.py)
+#and rebuilt when the borders change.
+
+import json
+import os
+import sys
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from shapely.strtree import STRtree
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIRECTORY)
+from btcmap.paths import CACHE_DIRECTORY
+
+BORDERS_DIRECTORY = os.path.join(REPO_DIRECTORY, "country-data-import", "input")
+INDEX_CACHE_FILE = os.path.join(CACHE_DIRECTORY, "country_borders_index.npz")
+INDEX_VERSION = 1
+COARSE_RESOLUTION = "110m"
+FINE_RESOLUTION = "10m"
+
+# How far (in degrees) the 110m shapes can stray from the 10m ones, points closer than this to a coarse border are refined
+BORDER_MARGIN_DEGREES = 0.5
+# Points in the sea within this distance (in degrees) of a country are given that country, e.g. island and harbour centroids
+NEAREST_MAX_DEGREES = 0.25
+# 10m polygons are halved until no piece has more vertices than this
+MAX_PIECE_VERTICES = 256
+
+
+def _borders_directory(resolution):
+    directory = os.path.join(BORDERS_DIRECTORY, f"geojson-regions-{resolution}")
+    if not os.path.isdir(directory):
+        print(f"Missing country borders in {directory}")
+        sys.exit(1)
+    return directory
+
+
+def _country_code(properties):
+    # France and Norway carry -99 in iso_a2 and their real code in iso_a2_eh
+    for key in ("iso_a2", "iso_a2_eh"):
+        code = properties.get(key)
+        if code and code != "-99":
+            return code
+    return None
+
+
+def load_borders(resolution, file_names=None):
+    """(country codes, geometries) for one resolution, optionally only the given files."""
+    directory = _borders_directory(resolution)
+    codes = []
+    geometries = []
+    for file_name in sorted(file_names if file_names is not None else os.listdir(directory)):
+        if not file_name.endswith(".geojson"):
+            continue
+        with open(os.path.join(directory, file_name), "r") as file:
+            feature = json.load(file)
+        # Skip the combined all.geojson and anything else that is not a single country
+        if feature.get("type") != "Feature":
+            continue
+        code = _country_code(feature["properties"])
+        if not code:
+            continue
+        codes.append(code)
+        geometries.append(shapely.make_valid(shape(feature["geometry"])))
+    return codes, geometries
+
+
+def _split_polygon(polygon, max_vertices, pieces):
+    # Halve along the longer side of the bounding box until every piece is small
+    if shapely.get_num_coordinates(polygon) <= max_vertices:
+        pieces.append(polygon)
+        return
+    min_x, min_y, max_x, max_y = polygon.bounds
+    if max_x - min_x >= max_y - min_y:
+        middle = (min_x + max_x) / 2
+        halves = (shapely.box(min_x, min_y, middle, max_y), shapely.box(middle, min_y, max_x, max_y))
+    else:
+        middle = (min_y + max_y) / 2
+        halves = (shapely.box(min_x, min_y, max_x, middle), shapely.box(min_x, middle, max_x, max_y))
+    for half in halves:
+        for part in shapely.get_parts(shapely.intersection(polygon, half)):
+            if part.geom_type == "Polygon" and not part.is_empty:
+                _split_polygon(part, max_vertices, pieces)
+
+
+def subdivide(codes, geometries, max_vertices=MAX_PIECE_VERTICES):
+    piece_codes = []
+    pieces = []
+    for code, geometry in zip(codes, geometries):
+        for part in shapely.get_parts(geometry):
+            if part.geom_type != "Polygon":
+                continue
+            part_pieces = []
+            _split_polygon(part, max_vertices, part_pieces)
+            pieces.extend(part_pieces)
+            piece_codes.extend([code] * len(part_pieces))
+    return piece_codes, pieces
+
+
+def build_coarse_shapes(border_margin=BORDER_MARGIN_DEGREES):
+    """110m shapes shrunk by border_margin, with the surroundings of countries missing at 110m cut out."""
+    coarse_codes, coarse_geometries = load_borders(COARSE_RESOLUTION)
+
+    # Small countries and territories only exist at 10m, the coarse shapes around them cannot be trusted
+    missing_files = sorted(set(os.listdir(_borders_directory(FINE_RESOLUTION))) - set(os.listdir(_borders_directory(COARSE_RESOLUTION))))
+    _, missing_geometries = load_borders(FINE_RESOLUTION, missing_files)
+    excluded = shapely.union_all([geometry.buffer(border_margin) for geometry in missing_geometries])
+
+    # A point inside exactly one shrunk coarse shape is in that country at any resolution
+    interiors = [shapely.difference(geometry.buffer(-border_margin), excluded) for geometry in coarse_geometries]
+    return coarse_codes, interiors
+
+
+def build_fine_shapes():
+    return subdivide(*load_borders(FINE_RESOLUTION))
+
+
+def borders_signature(border_margin=BORDER_MARGIN_DEGREES):
+    # The cache is rebuilt when any border file or a build parameter changes
+    signature = [INDEX_VERSION, border_margin, MAX_PIECE_VERTICES]
+    for resolution in (COARSE_RESOLUTION, FINE_RESOLUTION):
+        directory = _borders_directory(resolution)
+        for file_name in sorted(os.listdir(directory)):
+            stat = os.stat(os.path.join(directory, file_name))
+            signature.append([resolution, file_name, stat.st_size, stat.st_mtime_ns])
+    return json.dumps(signature)
+
+
+def _pack_wkb(geometries):
+    # WKB blobs joined into one byte array plus offsets, so the cache loads without pickle
+    blobs = shapely.to_wkb(np.array(geometries, dtype=object)).tolist()
+    offsets = np.cumsum([0] + [len(blob) for blob in blobs], dtype=np.int64)
+    return np.frombuffer(b"".join(blobs), dtype=np.uint8), offsets
+
+
+def _unpack_wkb(data, offsets):
+    data = data.tobytes()
+    return shapely.from_wkb([data[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())])
+
+
+def _index(codes, geometries):
+    geometries = np.array(geometries, dtype=object)
+    shapely.prepare(geometries)
+    return np.array(codes, dtype=object), geometries, STRtree(geometries)
+
+
+class CountryResolver:
+    """Resolve (lat, lon) points to ISO 3166-1 alpha-2 country codes."""
+
+    def __init__(self, border_margin=BORDER_MARGIN_DEGREES, cache_file=INDEX_CACHE_FILE):
+        self.border_margin = border_margin
+        self.cache_file = cache_file
+        self.cache = None
+        signature = borders_signature(border_margin)
+
+        if cache_file and os.path.exists(cache_file):
+            cache = np.load(cache_file, allow_pickle=False)
+            if str(cache["signature"]) == signature:
+                self.cache = cache
+
+        if self.cache is not None:
+            coarse_codes = self.cache["coarse_codes"].tolist()
+            coarse_shapes = _unpack_wkb(self.cache["coarse_wkb"], self.cache["coarse_offsets"])
+        else:
+            coarse_codes, coarse_shapes = build_coarse_shapes(border_margin)
+            fine_codes, fine_shapes = build_fine_shapes()
+            if cache_file:
+                self._save_cache(signature, coarse_codes, coarse_shapes, fine_codes, fine_shapes)
+            self.fine_shapes = (fine_codes, fine_shapes)
+
+        self.coarse_codes, self.coarse_geometries, self.coarse_tree = _index(coarse_codes, coarse_shapes)
+        self.fine_codes = None
+        self.fine_geometries = None
+        self.fine_tree = None
+
+    def _save_cache(self, signature, coarse_codes, coarse_shapes, fine_codes, fine_shapes):
+        temp_file = f"{self.cache_file}.tmp.npz"
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        coarse_wkb, coarse_offsets = _pack_wkb(coarse_shapes)
+        fine_wkb, fine_offsets = _pack_wkb(fine_shapes)
+        np.savez(temp_file,
+                 signature=np.array(signature),
+                 coarse_codes=np.array(coarse_codes),
+                 coarse_wkb=coarse_wkb,
+                 coarse_offsets=coarse_offsets,
+                 fine_codes=np.array(fine_codes),
+                 fine_wkb=fine_wkb,
+                 fine_offsets=fine_offsets)
+        os.replace(temp_file, self.cache_file)
+
+    def _load_fine(self):
+        # The 10m pieces are only read once a point needs refining
+        if self.fine_tree is not None:
+            return
+        if self.cache is not None:
+            codes = self.cache["fine_codes"].tolist()
+            shapes = _unpack_wkb(self.cache["fine_wkb"], self.cache["fine_offsets"])
+        else:
+            codes, shapes = self.fine_shapes
+        self.fine_codes, self.fine_geometries, self.fine_tree = _index(codes, shapes)
+
+    def resolve(self, coordinates):
+        """Country codes for a list of (lat, lon), None for points in no country."""
+        if not len(coordinates):
+            return []
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        points = shapely.points(coordinates[:, 1], coordinates[:, 0])
+        result = np.full(len(points), None, dtype=object)
+
+        point_index, geometry_index = self.coarse_tree.query(points, predicate="within")
+        hits = np.bincount(point_index, minlength=len(points))
+        decided = hits[point_index] == 1
+        result[point_index[decided]] = self.coarse_codes[geometry_index[decided]]
+
+        refine = np.flatnonzero(hits != 1)
+        if len(refine):
+            self._load_fine()
+            refine_points = points[refine]
+            point_index, geometry_index = self.fine_tree.query(refine_points, predicate="within")
+            # Pieces only touch along shared edges, so the first match is as good as any
+            _, first = np.unique(point_index, return_index=True)
+            result[refine[point_index[first]]] = self.fine_codes[geometry_index[first]]
+
+            unmatched = np.setdiff1d(np.arange(len(refine)), point_index)
+            if len(unmatched):
+                point_index, geometry_index = self.fine_tree.query_nearest(
+                    refine_points[unmatched], max_distance=NEAREST_MAX_DEGREES, all_matches=False)
+                result[refine[unmatched[point_index]]] = self.fine_codes[geometry_index]
+
+        return result.tolist()
+
+    def resolve_point(self, lat, lon):
+        return self.resolve([(lat, lon)])[0]
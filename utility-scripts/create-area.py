@@ -1,9 +1,11 @@
-import requests
 import json
 import sys
 import os
-from area import area
 from geojson_rewind import rewind
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+from btcmap.geometry import geodesic_area
+from btcmap.simplify import format_report, level_name, levels_of_detail
 
 # Set the working directory to the script's directory
 script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -49,6 +51,9 @@ matrix_link = None
 ln_address = 'btcisla@geyser.fund'
 tips_url = None
 
+# Zoom levels to also upload a simplified geo_json for, as geo_json:z<zoom> tags next to the full one, e.g. [8]
+simplified_zooms = []
+
 # Load in the GeoJSON
 geo_json = """
 {"type":"Polygon","coordinates":[[[-86.76,21.285],[-86.74,21.285],[-86.73,21.275],[-86.725,21.255],[-86.71,21.245],[-86.69,21.21],[-86.69,21.195],[-86.705,21.18],[-86.735,21.19],[-86.74,21.205],[-86.755,21.215],[-86.775,21.255],[-86.77,21.265],[-86.76,21.285]]]}
@@ -59,7 +64,7 @@ geo_json = json.loads(geo_json)
 geo_json = rewind(geo_json)
 
 # Calculate the area of the geojson
-area_m2 = area(geo_json)
+area_m2 = geodesic_area(geo_json)
 area_km2 = round(area_m2 / 1_000_000)
 
 # Create the params dictionary for the JSON-RPC request
@@ -98,6 +103,13 @@ params = {
     }
 }
 
+# Add the lightweight variants and report how much each one saves
+if simplified_zooms:
+    levels = levels_of_detail(geo_json, simplified_zooms)
+    print(format_report(alias, geo_json, levels))
+    for zoom in simplified_zooms:
+        params['tags'][f"geo_json:{level_name(zoom)}"] = levels[level_name(zoom)]
+
 # Remove elements with values set to None from the params dictionary
 params['tags'] = {k: v for k, v in params['tags'].items() if v is not None}
 
@@ -119,7 +131,7 @@ url = "https://api.btcmap.org/rpc"
 headers = {
     'Content-Type': 'application/json'
 }
-response = requests.post(url, headers=headers, data=json_payload)
+response = client.post(url, headers=headers, data=json_payload)
 
 # Check if the request was successful
 if response.status_code == 200:
@@ -1,7 +1,8 @@
-import requests
 import json
 import sys
 import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
 
 # Get the bearer token from the environment variable
 btcmap_api_token = os.getenv("BTCMAP_API_TOKEN")
@@ -42,7 +43,7 @@ for filename in os.listdir(data_directory):
         json_payload = json.dumps(area_data)
 
         # Send the query to the BTC Map API to create the area
-        response = requests.post(url, headers=headers, data=json_payload)
+        response = client.post(url, headers=headers, data=json_payload)
 
         # Check if the request was successful
         if response.status_code == 200:
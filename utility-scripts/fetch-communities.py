@@ -3,76 +3,46 @@
 Fetch new communities from BTC Map API starting from a given community.
 
 Usage:
-    python fetch-communities.py <start_community> [--max-empty N]
+    python fetch-communities.py <start_community> [--since YYYY-MM-DD] [--country-resolver borders|geocoder]
+    python fetch-communities.py <start_community> --probe [--max-empty N] [--workers N] [--rate N]
 
 Examples:
     python fetch-communities.py rhode-island-bitcoiners
     python fetch-communities.py 1050
-    python fetch-communities.py bitcoin-geneva --max-empty 3
+    python fetch-communities.py 1050 --since 2025-10-01
+    python fetch-communities.py bitcoin-geneva --probe --max-empty 3
+
+By default new communities are found with one paginated listing of the areas updated since the
+start community was created (or --since), keeping communities with a higher ID. With --probe,
+IDs are probed instead, concurrently by --workers threads sharing a limit of --rate requests per second.
 """
 
+import os
 import sys
 import requests
 import time
 import re
-import reverse_geocoder as rg
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from community_flags import COUNTRY_RESOLVERS, DEFAULT_COUNTRY_RESOLVER, FlagCache, country_code_to_flag_emoji, geometry_key
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+from btcmap.listing import iter_updated_since
 
 API_BASE = "https://api.btcmap.org/v3/areas"
-
-
-def calculate_centroid(geo_json):
-    """Calculate centroid from GeoJSON Polygon coordinates."""
-    if not geo_json or 'coordinates' not in geo_json:
-        return None
-    
-    coordinates = geo_json['coordinates']
-    if not coordinates or not isinstance(coordinates, list):
-        return None
-    
-    # Handle Polygon (list of rings) or MultiPolygon (list of polygons)
-    if isinstance(coordinates[0][0], list):
-        # Polygon - use first ring
-        ring = coordinates[0]
-    else:
-        # Single ring
-        ring = coordinates
-    
-    if not ring:
-        return None
-    
-    # Calculate centroid from all points
-    lats = [point[1] for point in ring if len(point) >= 2]
-    lons = [point[0] for point in ring if len(point) >= 2]
-    
-    if not lats or not lons:
-        return None
-    
-    return (sum(lats) / len(lats), sum(lons) / len(lons))
-
-
-def get_country_from_coordinates(lat, lon):
-    """Get country code from coordinates using reverse geocoding."""
-    try:
-        result = rg.search((lat, lon))
-        if result and len(result) > 0:
-            return result[0].get('cc')
-    except Exception as e:
-        print(f"Warning: Reverse geocoding failed: {e}", file=sys.stderr)
-    return None
-
-
-def country_code_to_flag_emoji(country_code):
-    """Convert 2-letter country code to flag emoji."""
-    if not country_code or len(country_code) != 2:
-        return None
-    return ''.join(chr(ord(c) + 127397) for c in country_code.upper())
+PROBE_WORKERS = 8
+# Requests per second across all workers, the sequential prober slept 0.1s between calls
+PROBE_RATE = 10
+# IDs probed ahead of the last one checked, doubled while communities keep turning up
+PROBE_MAX_WINDOW = 64
+LIST_PAGE_LIMIT = 5000
 
 
 def fetch_area_by_id(area_id):
     """Fetch area data from BTC Map API by ID."""
     url = f"{API_BASE}/{area_id}"
     try:
-        response = requests.get(url, timeout=10)
+        response = client.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
         elif response.status_code == 404:
@@ -89,7 +59,7 @@ def fetch_area_by_alias(alias):
     """Fetch area data from BTC Map API by URL alias."""
     url = f"{API_BASE}/{alias}"
     try:
-        response = requests.get(url, timeout=10)
+        response = client.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
         elif response.status_code == 404:
@@ -103,7 +73,7 @@ def fetch_area_by_alias(alias):
 
 
 def extract_community_info(area_data):
-    """Extract name, url_alias, id, and country flag from area data."""
+    """Extract name, url_alias and id from area data."""
     if not area_data or 'tags' not in area_data:
         return None
     
@@ -118,24 +88,132 @@ def extract_community_info(area_data):
             'name': name,
             'url_alias': url_alias
         }
-        
-        # Get country from GeoJSON centroid
-        geo_json = tags.get('geo_json')
-        if geo_json:
-            centroid = calculate_centroid(geo_json)
-            if centroid:
-                lat, lon = centroid
-                country_code = get_country_from_coordinates(lat, lon)
-                if country_code:
-                    flag = country_code_to_flag_emoji(country_code)
-                    if flag:
-                        community_info['flag'] = flag
-        
         return community_info
     return None
 
 
+def add_community_flags(communities, geometry_keys, flag_cache):
+    """Set each community's flag, resolving all of their countries in one batch."""
+    countries = flag_cache.countries_for_geometries(geometry_keys)
+    for community in communities:
+        flag = country_code_to_flag_emoji(countries.get(str(community['id'])))
+        if flag:
+            community['flag'] = flag
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate acquisitions per second with bursts up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def probe_communities(start_id, max_empty, workers=PROBE_WORKERS, rate=PROBE_RATE):
+    """Probe IDs from start_id upwards until max_empty consecutive IDs hold no community.
+
+    IDs ahead of the last checked one are fetched in parallel, but results are consumed in ID order,
+    so the communities found and the stopping point are the same as probing one ID at a time.
+    Returns ([(community_info, geometry_key)], number of IDs checked).
+    """
+    bucket = TokenBucket(rate, capacity=max(1, workers))
+
+    def fetch(area_id):
+        bucket.acquire()
+        return fetch_area_by_id(area_id)
+
+    found = []
+    empty_count = 0
+    total_checked = 0
+    current_id = start_id
+    next_id = start_id
+    # Probing fewer than max_empty IDs ahead could never settle a stop in one round
+    window = max(1, max_empty)
+    pending = {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        while empty_count < max_empty:
+            while next_id < current_id + window:
+                pending[next_id] = executor.submit(fetch, next_id)
+                next_id += 1
+
+            print(f"Checking ID {current_id}... (found: {len(found)}, empty streak: {empty_count})", end='\r', file=sys.stderr)
+            area_data = pending.pop(current_id).result()
+            total_checked += 1
+
+            community_info = extract_community_info(area_data) if area_data else None
+            if community_info:
+                # Only the geometry hash and centroid are kept for the flag lookup
+                found.append((community_info, geometry_key(area_data)))
+                empty_count = 0  # Reset empty count on success
+                window = min(window * 2, max(PROBE_MAX_WINDOW, max_empty))
+            else:
+                empty_count += 1
+                window = max(1, max_empty)
+
+            current_id += 1
+    finally:
+        # IDs fetched past the stopping point are discarded
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return found, total_checked
+
+
+def iter_areas_updated_since(updated_since, page_limit=LIST_PAGE_LIMIT):
+    """Yield every area updated after updated_since, streaming each page of the listing."""
+    try:
+        yield from iter_updated_since(API_BASE, updated_since, page_limit, timeout=60)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error listing areas updated since {updated_since}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def list_new_communities(start_id, updated_since):
+    """Communities with an ID above start_id among the areas updated since updated_since, in ID order.
+
+    Each area's GeoJSON is reduced to its geometry hash and centroid as it streams past.
+    Returns ([(community_info, geometry_key)], number of areas listed).
+    """
+    found = {}
+    listed = 0
+    for area_data in iter_areas_updated_since(updated_since):
+        listed += 1
+        area_id = area_data.get('id')
+        if area_id is None or area_id <= start_id or area_data.get('deleted_at'):
+            continue
+        if area_data.get('tags', {}).get('type') != 'community':
+            continue
+        community_info = extract_community_info(area_data)
+        if community_info:
+            found[area_id] = (community_info, geometry_key(area_data))
+    return [found[area_id] for area_id in sorted(found)], listed
+
+
+def get_int_option(name, default):
+    """Value of an optional integer argument such as --max-empty N."""
+    if name not in sys.argv:
+        return default
+    try:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    except (ValueError, IndexError):
+        print(f"Error: {name} requires an integer value", file=sys.stderr)
+        sys.exit(1)
 
 
 def is_integer(s):
@@ -162,34 +240,56 @@ def generate_markdown(communities):
         prefix = f"{flag} " if flag else ""
         print(f"- {prefix}[{community['name']}](https://btcmap.org/community/{community['url_alias']})")
     
-    print(f"\nWe now have 648+ Communities scattered across the planet. 🌎️")
+    print("\nWe now have 648+ Communities scattered across the planet. 🌎️")
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python fetch-communities.py <start_community> [--max-empty N]")
+        print("Usage: python fetch-communities.py <start_community> [--since YYYY-MM-DD] [--country-resolver borders|geocoder]")
+        print("       python fetch-communities.py <start_community> --probe [--max-empty N] [--workers N] [--rate N]")
         print("\nExamples:")
         print("    python fetch-communities.py rhode-island-bitcoiners")
         print("    python fetch-communities.py 1050")
-        print("    python fetch-communities.py bitcoin-geneva --max-empty 3")
+        print("    python fetch-communities.py 1050 --since 2025-10-01")
+        print("    python fetch-communities.py bitcoin-geneva --probe --max-empty 3")
         sys.exit(1)
     
     start_input = sys.argv[1]
-    max_empty = 5  # Default: stop after 5 consecutive empty results
+    max_empty = get_int_option('--max-empty', 5)  # Default: stop after 5 consecutive empty results
+    workers = get_int_option('--workers', PROBE_WORKERS)
+    rate = get_int_option('--rate', PROBE_RATE)
+    if workers < 1 or rate < 1:
+        print("Error: --workers and --rate must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    probe = '--probe' in sys.argv
+    
+    # Parse optional --since argument
+    since = None
+    if '--since' in sys.argv:
+        since_idx = sys.argv.index('--since')
+        if since_idx + 1 >= len(sys.argv) or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", sys.argv[since_idx + 1]):
+            print("Error: --since requires a date as YYYY-MM-DD", file=sys.stderr)
+            sys.exit(1)
+        since = f"{sys.argv[since_idx + 1]}T00:00:00Z"
     
-    # Parse optional --max-empty argument
-    if '--max-empty' in sys.argv:
-        try:
-            max_empty_idx = sys.argv.index('--max-empty')
-            max_empty = int(sys.argv[max_empty_idx + 1])
-        except (ValueError, IndexError):
-            print("Error: --max-empty requires an integer value", file=sys.stderr)
+    # Parse optional --country-resolver argument
+    country_resolver = DEFAULT_COUNTRY_RESOLVER
+    if '--country-resolver' in sys.argv:
+        resolver_idx = sys.argv.index('--country-resolver')
+        if resolver_idx + 1 >= len(sys.argv) or sys.argv[resolver_idx + 1] not in COUNTRY_RESOLVERS:
+            print(f"Error: --country-resolver must be one of {', '.join(COUNTRY_RESOLVERS)}", file=sys.stderr)
             sys.exit(1)
+        country_resolver = sys.argv[resolver_idx + 1]
     
     # Determine if input is an ID or alias
+    start_created_at = None
     if is_integer(start_input):
         start_id = int(start_input)
         print(f"Starting from ID: {start_id}", file=sys.stderr)
+        if not probe and not since:
+            # The listing starts from when the start community was created
+            area_data = fetch_area_by_id(start_id)
+            start_created_at = area_data.get('created_at') if area_data else None
     else:
         # It's an alias, fetch to get the ID
         print(f"Fetching community '{start_input}' to get ID...", file=sys.stderr)
@@ -204,38 +304,34 @@ def main():
             sys.exit(1)
         
         start_id = community_info['id']
+        start_created_at = area_data.get('created_at')
         print(f"Found '{community_info['name']}' with ID: {start_id}", file=sys.stderr)
     
-    # Start from the next ID
-    current_id = start_id + 1
-    
-    print(f"Fetching new communities starting from ID {current_id}...", file=sys.stderr)
-    print(f"Will stop after {max_empty} consecutive empty results\n", file=sys.stderr)
-    
-    communities = []
-    empty_count = 0
-    total_checked = 0
+    updated_since = since or start_created_at
+    if not probe and not updated_since:
+        print(f"Could not find when ID {start_id} was created, falling back to probing IDs", file=sys.stderr)
+        probe = True
     
-    while empty_count < max_empty:
-        print(f"Checking ID {current_id}... (found: {len(communities)}, empty streak: {empty_count})", end='\r', file=sys.stderr)
+    flag_cache = FlagCache(resolver=country_resolver)
+    if probe:
+        # Start from the next ID
+        current_id = start_id + 1
         
-        area_data = fetch_area_by_id(current_id)
-        total_checked += 1
+        print(f"Fetching new communities starting from ID {current_id}...", file=sys.stderr)
+        print(f"Will stop after {max_empty} consecutive empty results\n", file=sys.stderr)
         
-        if area_data:
-            community_info = extract_community_info(area_data)
-            if community_info:
-                communities.append(community_info)
-                empty_count = 0  # Reset empty count on success
-            else:
-                empty_count += 1
-        else:
-            empty_count += 1
-        
-        current_id += 1
-        time.sleep(0.1)  # Rate limiting
+        found, total_checked = probe_communities(current_id, max_empty, workers, rate)
+        summary = f"checked {total_checked} IDs"
+    else:
+        print(f"Listing areas updated since {updated_since} for communities after ID {start_id}...", file=sys.stderr)
+        found, total_listed = list_new_communities(start_id, updated_since)
+        summary = f"listed {total_listed} updated areas"
+    communities = [community_info for community_info, _ in found]
+    
+    add_community_flags(communities, [key for _, key in found], flag_cache)
+    flag_cache.save()
     
-    print(f"\n\nFound {len(communities)} new communities (checked {total_checked} IDs)", file=sys.stderr)
+    print(f"\n\nFound {len(communities)} new communities ({summary})", file=sys.stderr)
     
     generate_markdown(communities)
 
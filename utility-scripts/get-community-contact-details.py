@@ -1,9 +1,10 @@
 #Gets email, twitter and nosrt contact details for communities.
 
-import requests
 import csv
 import os
 import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
 
 # Set the working directory to the script's directory
 script_directory = os.path.dirname(os.path.abspath(__file__))
@@ -16,7 +17,7 @@ headers = {
 }
 
 # Send a GET request to fetch all areas
-response = requests.get(url)
+response = client.get(url)
 
 if response.status_code != 200:
     print(f"Error fetching areas: {response.text}")
@@ -1,9 +1,10 @@
 #This script updates BTC Map areas of a given type with the KM^2 area of its GeoJSON.
 
-import requests
 import json
 import sys
 import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
 
 # Get the bearer token from the environment variable
 btcmap_api_token = os.getenv("BTCMAP_API_TOKEN")
@@ -339,7 +340,7 @@ payload = json.loads(tags)
 print(payload)
 
 # Send a PATCH request to update the 'km2' tag
-response = requests.patch(url, headers=headers, data=payload)
+response = client.patch(url, headers=headers, data=payload)
 
 if response.status_code == 200:
     print(f"Successfully patched {id}")
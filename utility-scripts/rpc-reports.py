@@ -3,12 +3,21 @@ import requests
 import json
 import sys
 import os
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 from calendar import monthrange
-import reverse_geocoder as rg
+from community_flags import COUNTRY_RESOLVERS, DEFAULT_COUNTRY_RESOLVER, FlagCache, country_code_to_flag_emoji
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
 
 RPC_URL = "https://api.btcmap.org/rpc"
-API_BASE = "https://api.btcmap.org/v3/areas"
+# The report sections are independent, so they can all be in flight at once
+RPC_MAX_WORKERS = 5
+# Request ids must be unique within a batch so responses can be matched back
+rpc_ids = itertools.count(1)
 
 btcmap_api_token = os.getenv("BTCMAP_API_TOKEN")
 
@@ -16,26 +25,29 @@ if not btcmap_api_token:
     print("Please set the BTCMAP_API_TOKEN environment variable.")
     sys.exit(1)
 
-def call_rpc(method, params=None):
-    """Call a JSON-RPC method on the BTC Map API."""
+def rpc_payload(method, params=None):
+    """Build a JSON-RPC 2.0 request with a fresh id."""
     if params is None:
         params = {}
     params["password"] = btcmap_api_token
     
-    payload = {
+    return {
         "jsonrpc": "2.0",
         "method": method,
         "params": params,
-        "id": 1
+        "id": next(rpc_ids)
     }
-    
-    headers = {
+
+def rpc_headers():
+    return {
         'Content-Type': 'application/json',
         'Authorization': f'Bearer {btcmap_api_token}'
     }
-    
+
+def post_rpc(payload):
+    """Send one JSON-RPC request and return its result, or None on failure."""
     try:
-        response = requests.post(RPC_URL, headers=headers, data=json.dumps(payload))
+        response = client.post(RPC_URL, headers=rpc_headers(), data=json.dumps(payload))
         response.raise_for_status()
         result = response.json()
         
@@ -48,6 +60,97 @@ def call_rpc(method, params=None):
         print(f"Request failed: {e}")
         return None
 
+def call_rpc(method, params=None):
+    """Call a JSON-RPC method on the BTC Map API."""
+    return post_rpc(rpc_payload(method, params))
+
+class RpcBatch:
+    """Queue JSON-RPC calls and send them as one JSON-RPC 2.0 batch request.
+
+    add() returns the id of the queued call, send() returns {id: result} with None for
+    failed calls. If the server rejects the batch, the calls are sent one at a time instead,
+    and so are the calls of every later send().
+    """
+
+    def __init__(self):
+        self.payloads = []
+        self.batched = True
+
+    def add(self, method, params=None):
+        payload = rpc_payload(method, params)
+        self.payloads.append(payload)
+        return payload["id"]
+
+    def send(self):
+        payloads, self.payloads = self.payloads, []
+        if not payloads:
+            return {}
+        if not self.batched:
+            return {payload["id"]: post_rpc(payload) for payload in payloads}
+
+        try:
+            response = client.post(RPC_URL, headers=rpc_headers(), data=json.dumps(payloads))
+        except requests.RequestException as e:
+            print(f"Request failed: {e}")
+            return {payload["id"]: None for payload in payloads}
+
+        try:
+            responses = response.json() if response.ok else None
+        except ValueError:
+            responses = None
+
+        # A server without batch support answers with an HTTP error or a single error object
+        if not isinstance(responses, list):
+            print("RPC batch rejected, sending the calls one at a time", file=sys.stderr)
+            self.batched = False
+            return {payload["id"]: post_rpc(payload) for payload in payloads}
+
+        results = {payload["id"]: None for payload in payloads}
+        for item in responses:
+            if not isinstance(item, dict) or item.get("id") not in results:
+                continue
+            if 'error' in item:
+                print(f"RPC Error: {item['error']}")
+                continue
+            results[item["id"]] = item.get('result')
+        return results
+
+def timed_call_rpc(method, params=None):
+    """Call a JSON-RPC method and return (result, seconds)."""
+    started = time.perf_counter()
+    result = call_rpc(method, params)
+    return result, time.perf_counter() - started
+
+def dispatch_rpc_calls(calls, concurrent=True, batch=False):
+    """Run independent RPC calls and return {name: (result, seconds)} in the order given.
+
+    calls maps a name to (method, params). With concurrent, the calls go out in parallel
+    on a bounded thread pool, so wall time is the slowest call instead of the sum.
+    With batch, they share one round trip and have no timing of their own (seconds is None).
+    """
+    if batch:
+        rpc_batch = RpcBatch()
+        ids = {name: rpc_batch.add(method, params) for name, (method, params) in calls.items()}
+        results = rpc_batch.send()
+        return {name: (results[ids[name]], None) for name in calls}
+
+    if not concurrent:
+        return {name: timed_call_rpc(method, params) for name, (method, params) in calls.items()}
+
+    with ThreadPoolExecutor(max_workers=min(RPC_MAX_WORKERS, len(calls))) as executor:
+        futures = {name: executor.submit(timed_call_rpc, method, params) for name, (method, params) in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def print_rpc_timings(timings, wall_seconds):
+    """Print per-call timings to stderr so the markdown output stays clean."""
+    print("RPC timings:", file=sys.stderr)
+    for name, (_, seconds) in sorted(timings.items(), key=lambda item: item[1][1] or 0, reverse=True):
+        if seconds is None:
+            print(f"  {name:<28} {'batched':>8}", file=sys.stderr)
+        else:
+            print(f"  {name:<28} {seconds:7.2f}s", file=sys.stderr)
+    print(f"  {'wall time':<28} {wall_seconds:7.2f}s", file=sys.stderr)
+
 def format_markdown_table(data, headers):
     """Format data as a markdown table."""
     if not data:
@@ -65,85 +168,13 @@ def format_markdown_table(data, headers):
     
     return "\n".join(lines) + "\n"
 
-def calculate_centroid(geo_json):
-    """Calculate centroid from GeoJSON Polygon coordinates."""
-    if not geo_json or 'coordinates' not in geo_json:
-        return None
-    
-    coordinates = geo_json['coordinates']
-    if not coordinates or not isinstance(coordinates, list):
-        return None
-    
-    # Handle Polygon (list of rings) or MultiPolygon (list of polygons)
-    if isinstance(coordinates[0][0], list):
-        # Polygon - use first ring
-        ring = coordinates[0]
-    else:
-        # Single ring
-        ring = coordinates
-    
-    if not ring:
-        return None
-    
-    # Calculate centroid from all points
-    lats = [point[1] for point in ring if len(point) >= 2]
-    lons = [point[0] for point in ring if len(point) >= 2]
-    
-    if not lats or not lons:
-        return None
-    
-    return (sum(lats) / len(lats), sum(lons) / len(lons))
-
-
-def get_country_from_coordinates(lat, lon):
-    """Get country code from coordinates using reverse geocoding."""
-    try:
-        result = rg.search((lat, lon))
-        if result and len(result) > 0:
-            return result[0].get('cc')
-    except Exception as e:
-        print(f"Warning: Reverse geocoding failed: {e}", file=sys.stderr)
-    return None
-
-
-def country_code_to_flag_emoji(country_code):
-    """Convert 2-letter country code to flag emoji."""
-    if not country_code or len(country_code) != 2:
-        return None
-    return ''.join(chr(ord(c) + 127397) for c in country_code.upper())
-
-
-def fetch_area_geojson(area_id):
-    """Fetch area data from REST API to get GeoJSON."""
-    url = f"{API_BASE}/{area_id}"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except requests.RequestException:
-        return None
+def get_community_flags(area_ids, flag_cache):
+    """Get flag emojis for communities by ID as {area id: flag}, resolved in one batch."""
+    countries = flag_cache.countries_for_ids(area_ids)
+    return {area_id: country_code_to_flag_emoji(country_code) for area_id, country_code in countries.items()}
 
 
-def get_community_flag(area_id):
-    """Get flag emoji for a community by its ID."""
-    area_data = fetch_area_geojson(area_id)
-    if not area_data or 'tags' not in area_data:
-        return None
-    
-    tags = area_data['tags']
-    geo_json = tags.get('geo_json')
-    if geo_json:
-        centroid = calculate_centroid(geo_json)
-        if centroid:
-            lat, lon = centroid
-            country_code = get_country_from_coordinates(lat, lon)
-            if country_code:
-                return country_code_to_flag_emoji(country_code)
-    return None
-
-
-def format_generic_table(data, is_communities=False):
+def format_generic_table(data, is_communities=False, flag_cache=None):
     """Format any data structure as a markdown table."""
     if not data:
         return "No data returned.\n"
@@ -158,6 +189,11 @@ def format_generic_table(data, is_communities=False):
                     return 'Total'
                 return h.capitalize()
             
+            # Resolve every community's flag up front so the geocoding is one batched lookup
+            flags = {}
+            if is_communities and flag_cache:
+                flags = get_community_flags([row.get('id') for row in data if row.get('id')], flag_cache)
+            
             lines = []
             lines.append("| " + " | ".join(format_header(h) for h in display_headers) + " |")
             lines.append("| " + " | ".join(["---"] * len(display_headers)) + " |")
@@ -169,8 +205,8 @@ def format_generic_table(data, is_communities=False):
                     val = str(row.get(h, ""))[:50]
                     if h == 'name' and url:
                         # Get flag for communities
-                        if is_communities and area_id:
-                            flag = get_community_flag(area_id)
+                        if is_communities and area_id and flag_cache:
+                            flag = flags.get(str(area_id))
                             if flag:
                                 val = f"{flag} [{val}]({url})"
                             else:
@@ -267,6 +303,17 @@ def format_report_comparison(prev_report, curr_report):
     return "\n".join(lines)
 
 def main():
+    parser = argparse.ArgumentParser(description="BTC Map RPC reports")
+    dispatch = parser.add_mutually_exclusive_group()
+    dispatch.add_argument("--sequential", action="store_true",
+                          help="Make the RPC calls one after another instead of in parallel")
+    dispatch.add_argument("--batch", action="store_true",
+                          help="Send every RPC call in one JSON-RPC batch request")
+    parser.add_argument("--no-timings", action="store_true", help="Do not print per-call timings")
+    parser.add_argument("--country-resolver", choices=COUNTRY_RESOLVERS, default=DEFAULT_COUNTRY_RESOLVER,
+                        help=f"How community flags find their country (default: {DEFAULT_COUNTRY_RESOLVER})")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("BTC Map RPC Reports")
     print("=" * 60)
@@ -286,13 +333,41 @@ def main():
     print("=" * 60)
     print()
     
+    prev_start, prev_end = get_comparison_month(start_date)
+    prev_start_iso = f"{prev_start}T00:00:00Z"
+    prev_end_iso = f"{prev_end}T23:59:59Z"
+
+    # Every call is independent, sections are still printed in this order once they are all back
+    started = time.perf_counter()
+    responses = dispatch_rpc_calls({
+        "get_trending_countries": ("get_trending_countries", {
+            "period_start": start_date,
+            "period_end": end_date
+        }),
+        "get_trending_communities": ("get_trending_communities", {
+            "period_start": start_date,
+            "period_end": end_date
+        }),
+        "get_report (current)": ("get_report", {
+            "start": start_iso,
+            "end": end_iso
+        }),
+        "get_report (previous)": ("get_report", {
+            "start": prev_start_iso,
+            "end": prev_end_iso
+        }),
+        "get_most_active_users": ("get_most_active_users", {
+            "period_start": start_date,
+            "period_end": end_date,
+            "limit": 20
+        }),
+    }, concurrent=not args.sequential, batch=args.batch)
+    wall_seconds = time.perf_counter() - started
+
     print("## Trending Countries")
     print(f"*Period: {start_date} to {end_date}*")
     print()
-    result = call_rpc("get_trending_countries", {
-        "period_start": start_date,
-        "period_end": end_date
-    })
+    result = responses["get_trending_countries"][0]
     if result:
         print(format_generic_table(result))
     else:
@@ -302,12 +377,12 @@ def main():
     print("## Trending Communities")
     print(f"*Period: {start_date} to {end_date}*")
     print()
-    result = call_rpc("get_trending_communities", {
-        "period_start": start_date,
-        "period_end": end_date
-    })
+    result = responses["get_trending_communities"][0]
     if result:
-        print(format_generic_table(result, is_communities=True))
+        flag_cache = FlagCache(resolver=args.country_resolver)
+        flag_cache.revalidate()
+        print(format_generic_table(result, is_communities=True, flag_cache=flag_cache))
+        flag_cache.save()
     else:
         print("Failed to fetch trending communities.\n")
     
@@ -316,18 +391,8 @@ def main():
     print(f"*Period: {start_date} to {end_date} (compared to previous month)*")
     print()
     
-    prev_start, prev_end = get_comparison_month(start_date)
-    prev_start_iso = f"{prev_start}T00:00:00Z"
-    prev_end_iso = f"{prev_end}T23:59:59Z"
-    
-    curr_report = call_rpc("get_report", {
-        "start": start_iso,
-        "end": end_iso
-    })
-    prev_report = call_rpc("get_report", {
-        "start": prev_start_iso,
-        "end": prev_end_iso
-    })
+    curr_report = responses["get_report (current)"][0]
+    prev_report = responses["get_report (previous)"][0]
     
     if curr_report and prev_report:
         print(format_report_comparison(prev_report, curr_report))
@@ -339,11 +404,7 @@ def main():
     print("## Most Active Users")
     print(f"*Period: {start_date} to {end_date}*")
     print()
-    result = call_rpc("get_most_active_users", {
-        "period_start": start_date,
-        "period_end": end_date,
-        "limit": 20
-    })
+    result = responses["get_most_active_users"][0]
     if result and 'users' in result:
         users = result['users']
         headers = ['Name', 'Total Edits', 'Created', 'Updated', 'Deleted']
@@ -370,5 +431,8 @@ def main():
     else:
         print("Failed to fetch most active users.\n")
 
+    if not args.no_timings:
+        print_rpc_timings(responses, wall_seconds)
+
 if __name__ == "__main__":
     main()
@@ -1,77 +1,182 @@
-#This script updates BTC Map areas of a given type with the KM^2 area of its GeoJSON.
+#This script updates BTC Map areas with the KM^2 area of their GeoJSON.
+#Every area of the chosen type (or every area) is measured in one pass, the result is compared with the stored
+#area_km2 tag and only the areas that differ by more than the tolerance are PATCHed, a few at a time.
+#
+#The areas must be chosen with --type, --alias or --all, so a bare run never writes to every area.
+#
+#Usage:
+#    python update-areas-with-km2.py (--type TYPE | --alias ALIAS ... | --all) [--dry-run] [--workers N]
+#
+#Examples:
+#    python update-areas-with-km2.py --type country --dry-run
+#    python update-areas-with-km2.py --alias bitcoin-valley
+#    python update-areas-with-km2.py --all --dry-run
 
-import requests
+import argparse
 import json
 import sys
 import os
-from area import area as area_calc
-
-# Get the bearer token from the environment variable
-btcmap_api_token = os.getenv("BTCMAP_API_TOKEN")
-
-if not btcmap_api_token:
-    print("Please set the BTCMAP_API_TOKEN environment variable.")
-    sys.exit(1)
-
-# Define the API URL to fetch all areas
-url = "https://api.btcmap.org/areas"
-headers = {
-    'Authorization': f'Bearer {btcmap_api_token}',
-    'Content-Type': 'application/json'
-}
-
-# Send a GET request to fetch all areas
-response = requests.get(url, headers=headers)
-
-if response.status_code != 200:
-    print(f"Error fetching areas: {response.text}")
-    sys.exit(1)
-
-# Parse the response JSON
-areas = response.json()
-
-# Define the area type and area ID to filter (replace with your values)
-#area_type_filter = "country"
-area_filter = "bitcoin-valley"
-
-# Now, iterate through the features and treat each one as an area
-for id in areas:
-    tags = id.get('tags', None)
-    area = tags.get('url_alias')
-    area_type = tags.get('type')
-    update_url = f"https://api.btcmap.org/areas/{area}"
-
-    if area == area_filter:
-        geojson = tags.get('geo_json', None)
-
-        if geojson is not None:
-                      
-            # Calculate the area of the geometry
-            area_m2 = area_calc(geojson)
-            area_km2 = round((area_m2 / 1_000_000),2)
-
-            if area_km2 != 0:
-                
-                # Define the payload to update the 'km2' tag
-                area_km2_json = { "tags":
-                                    {
-                                    "area_km2": area_km2
-                                    }
-                                }
-
-                payload = json.dumps(area_km2_json)
-                
-                # Send a PATCH request to update the 'km2' tag
-                response = requests.patch(update_url, headers=headers, data=payload)
-
-                if response.status_code == 200:
-                    print(f"Updated 'km2' for area ID {area} to {area_km2} km2")
-                else:
-                    print(f"Error updating {area}: {response.text}")
-            
-            else:
-                print(f"{area} has an 0 KM2 value")
-        
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from btcmap import client
+from btcmap.geometry import geodesic_areas
+
+AREAS_URL = "https://api.btcmap.org/areas"
+PATCH_WORKERS = 5
+# Stored values are rounded to 2 decimals, anything within a rounding step or 0.1% is left alone
+ABSOLUTE_TOLERANCE_KM2 = 0.01
+RELATIVE_TOLERANCE = 0.001
+
+
+def api_headers(token):
+    return {
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json'
+    }
+
+
+def fetch_areas(headers):
+    # Send a GET request to fetch all areas, always revalidated so the area_km2 a previous run patched is seen
+    response = client.get(AREAS_URL, headers=headers, cache_ttl=0)
+
+    if response.status_code != 200:
+        print(f"Error fetching areas: {response.text}")
+        sys.exit(1)
+
+    # Parse the response JSON
+    return response.json()
+
+
+def stored_km2(tags):
+    value = tags.get('area_km2')
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def needs_update(stored, area_km2, absolute_tolerance=ABSOLUTE_TOLERANCE_KM2, relative_tolerance=RELATIVE_TOLERANCE):
+    if stored is None:
+        return True
+    return abs(area_km2 - stored) > max(absolute_tolerance, relative_tolerance * abs(area_km2))
+
+
+def plan_updates(areas, area_type=None, aliases=None, absolute_tolerance=ABSOLUTE_TOLERANCE_KM2, relative_tolerance=RELATIVE_TOLERANCE):
+    """(changes, counts) where changes are (alias, stored km2, new km2) for the areas to PATCH."""
+    changes = []
+    counts = {"matched": 0, "unchanged": 0, "changed": 0, "no_geojson": 0, "zero_area": 0}
+
+    selected = []
+    for area_data in areas:
+        tags = area_data.get('tags') or {}
+        alias = tags.get('url_alias')
+        if area_data.get('deleted_at') or not alias:
+            continue
+        if area_type and tags.get('type') != area_type:
+            continue
+        if aliases and alias not in aliases:
+            continue
+        counts["matched"] += 1
+
+        if tags.get('geo_json', None) is None:
+            print(f"{alias} does not have a geojson")
+            counts["no_geojson"] += 1
+            continue
+        selected.append((alias, tags))
+
+    # Calculate the area of every selected geometry in one vectorized pass
+    areas_m2 = geodesic_areas([tags['geo_json'] for _, tags in selected])
+
+    for (alias, tags), area_m2 in zip(selected, areas_m2.tolist()):
+        area_km2 = round(area_m2 / 1_000_000, 2)
+        if area_km2 == 0:
+            print(f"{alias} has an 0 KM2 value")
+            counts["zero_area"] += 1
+            continue
+
+        stored = stored_km2(tags)
+        if needs_update(stored, area_km2, absolute_tolerance, relative_tolerance):
+            changes.append((alias, stored, area_km2))
+            counts["changed"] += 1
         else:
+            counts["unchanged"] += 1
+
+    return changes, counts
+
+
+def patch_area_km2(headers, alias, area_km2):
+    # Define the payload to update the 'km2' tag
+    payload = json.dumps({"tags": {"area_km2": area_km2}})
+    try:
+        response = client.patch(f"{AREAS_URL}/{alias}", headers=headers, data=payload)
+    except Exception as e:
+        return False, str(e)
+    return response.status_code == 200, response.text
+
+
+def apply_updates(headers, changes, workers=PATCH_WORKERS):
+    """PATCH every change through a pool of at most workers requests in flight, returns the failed aliases."""
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda change: patch_area_km2(headers, change[0], change[2]), changes)
+        for (alias, _, area_km2), (ok, text) in zip(changes, results):
+            if ok:
+                print(f"Updated 'km2' for area ID {alias} to {area_km2} km2")
+            else:
+                print(f"Error updating {alias}: {text}")
+                failed.append(alias)
+    return failed
+
+
+def print_changes(changes):
+    print(f"\n{'Area':<40} {'Stored km2':>14} {'New km2':>14}")
+    for alias, stored, area_km2 in changes:
+        stored_text = f"{stored:.2f}" if stored is not None else "-"
+        print(f"{alias:<40} {stored_text:>14} {area_km2:>14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set area_km2 on BTC Map areas whose stored value is missing or wrong")
+    parser.add_argument("--type", dest="area_type", help="Only areas with this type tag, e.g. country or community (default: all)")
+    parser.add_argument("--alias", action="append", help="Only this url_alias, can be repeated")
+    parser.add_argument("--all", action="store_true", help="Every area, when neither --type nor --alias is given")
+    parser.add_argument("--dry-run", action="store_true", help="List the changes without sending any PATCH")
+    parser.add_argument("--workers", type=int, default=PATCH_WORKERS, help=f"PATCH requests in flight (default: {PATCH_WORKERS})")
+    parser.add_argument("--tolerance", type=float, default=ABSOLUTE_TOLERANCE_KM2,
+                        help=f"Differences up to this many km2 are ignored (default: {ABSOLUTE_TOLERANCE_KM2})")
+    parser.add_argument("--relative-tolerance", type=float, default=RELATIVE_TOLERANCE,
+                        help=f"Differences up to this share of the area are ignored (default: {RELATIVE_TOLERANCE})")
+    args = parser.parse_args()
+    if not (args.area_type or args.alias or args.all):
+        parser.error("choose the areas to update with --type, --alias or --all")
+
+    # Get the bearer token from the environment variable
+    btcmap_api_token = os.getenv("BTCMAP_API_TOKEN")
+
+    if not btcmap_api_token:
+        print("Please set the BTCMAP_API_TOKEN environment variable.")
+        sys.exit(1)
+
+    headers = api_headers(btcmap_api_token)
+    areas = fetch_areas(headers)
+    changes, counts = plan_updates(areas, args.area_type, set(args.alias) if args.alias else None,
+                                   args.tolerance, args.relative_tolerance)
+
+    if changes and args.dry_run:
+        print_changes(changes)
+    failed = []
+    if changes and not args.dry_run:
+        failed = apply_updates(headers, changes, max(1, args.workers))
+
+    print(f"\n{counts['matched']} areas checked: {counts['changed']} to update, {counts['unchanged']} unchanged, "
+          f"{counts['no_geojson']} without geojson, {counts['zero_area']} with 0 km2")
+    if args.dry_run:
+        print("Dry run, nothing was sent")
+    else:
+        print(f"{counts['changed'] - len(failed)} updated, {len(failed)} failed")
+        if failed:
+            sys.exit(1)
+
 
-            print(f"{area} does not have a geojson")
\ No newline at end of file
+if __name__ == "__main__":
+    main()